@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def gnn_assign(rows, cols, costs, n_measurements, n_tracks):
+    # Global nearest neighbour over the sparse gated cost matrix. Measurements and tracks that
+    # share no gated pair never interact, so each connected component of the bipartite gate
+    # graph is solved on its own; most components are a single pair and need no solver at all.
+    # scipy is imported here so that first-fit users never load it.
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    assignments = np.full(n_measurements, -1, dtype=np.intp)
+    if len(rows) == 0:
+        return assignments
+
+    graph = coo_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols + n_measurements)),
+        shape=(n_measurements + n_tracks,) * 2,
+    )
+    _, labels = connected_components(graph, directed=False)
+    component = labels[rows]
+    pair_counts = np.bincount(component)
+
+    single = pair_counts[component] == 1
+    assignments[rows[single]] = cols[single]
+
+    order = np.argsort(component, kind="stable")
+    order = order[~single[order]]
+    boundaries = np.flatnonzero(np.diff(component[order])) + 1
+    for cluster in np.split(order, boundaries):
+        if len(cluster) == 0:
+            continue
+        cluster_rows, local_rows = np.unique(rows[cluster], return_inverse=True)
+        cluster_cols, local_cols = np.unique(cols[cluster], return_inverse=True)
+        # Ungated entries cost more than any full set of gated ones, so the solver first
+        # maximises the number of gated assignments and only then minimises their total cost
+        forbidden = costs[cluster].sum() + 1.0
+        matrix = np.full((len(cluster_rows), len(cluster_cols)), forbidden)
+        matrix[local_rows, local_cols] = costs[cluster]
+        picked_rows, picked_cols = linear_sum_assignment(matrix)
+        gated = matrix[picked_rows, picked_cols] < forbidden
+        assignments[cluster_rows[picked_rows[gated]]] = cluster_cols[picked_cols[gated]]
+    return assignments
@@ -0,0 +1,206 @@
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+import test_f
+import test_tr_in1
+import tr_in2
+import tr_inf
+from chi2_gating import chi2_threshold
+from confirmation import MofN
+from metrics import Metrics
+from scenario import scenario_for_size, split_scans
+from tracker import Tracker
+
+DOPPLER_THRESHOLD = 2.0
+RANGE_THRESHOLD = 10.0
+FIRM_THRESHOLD = 3
+CONFIDENCE = 0.95
+ALPHA_BETA = (0.8, 0.5)
+# Fastest target of the synthetic scenarios
+MAX_SPEED = 50.0
+CONFIRM = (3, 5)
+DELETE = (3, 3)
+
+
+class StageTimer:
+    # breakdown optionally splits the associate stage further, as Metrics stage seconds
+    def __init__(self):
+        self.stages = {}
+        self.breakdown = None
+        self.start = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self.start
+        self.start = now
+
+
+def run_tr_inf(scenario, timer):
+    measurements = [tuple(row) for row in scenario.plots.tolist()]
+    timer.lap("prepare")
+    tr_inf.initialize_tracks(measurements, DOPPLER_THRESHOLD, RANGE_THRESHOLD, FIRM_THRESHOLD)
+    timer.lap("associate")
+
+
+def run_tr_in2(scenario, timer):
+    measurements = [tuple(row) for row in scenario.plots.tolist()]
+    timer.lap("prepare")
+    tr_in2.initialize_tracks(measurements, DOPPLER_THRESHOLD, RANGE_THRESHOLD, FIRM_THRESHOLD)
+    timer.lap("associate")
+
+
+def run_test_tr_in1(scenario, timer):
+    measurements = [tuple(row) for row in scenario.plots.tolist()]
+    timer.lap("prepare")
+    test_tr_in1.initialize_tracks(measurements, DOPPLER_THRESHOLD, RANGE_THRESHOLD)
+    timer.lap("associate")
+
+
+def run_test_f(scenario, timer):
+    converted = [
+        test_f.sph2cart(az, el, r) + (doppler,) for az, el, r, doppler, _ in scenario.plots.tolist()
+    ]
+    cov_inv = np.linalg.inv(np.eye(3))
+    threshold = chi2_threshold(CONFIDENCE, dim=3)
+    timer.lap("convert")
+    test_f.initialize_tracks(converted, cov_inv, threshold, DOPPLER_THRESHOLD, RANGE_THRESHOLD)
+    timer.lap("associate")
+
+
+def run_test_f_batch(scenario, timer):
+    scans = split_scans(scenario)
+    metrics = Metrics()
+    timer.lap("prepare")
+    test_f.initialize_tracks_batch(scans, np.eye(3), CONFIDENCE, DOPPLER_THRESHOLD, RANGE_THRESHOLD, metrics=metrics)
+    timer.lap("associate")
+    timer.breakdown = dict(metrics.stage_seconds)
+
+
+def run_tracker(options, scenario, timer):
+    # The Tracker's own metrics break the association time down by stage
+    scans = split_scans(scenario)
+    metrics = Metrics()
+    tracker = Tracker(DOPPLER_THRESHOLD, RANGE_THRESHOLD, metrics=metrics, **options)
+    timer.lap("prepare")
+    for scan in scans:
+        tracker.process_scan(scan)
+    timer.lap("associate")
+    timer.breakdown = dict(metrics.stage_seconds)
+
+
+# Tracker options of each Tracker variant
+TRACKER_VARIANTS = {
+    "tracker": {"firm_threshold": FIRM_THRESHOLD, "max_misses": FIRM_THRESHOLD},
+    "tracker_gnn": {"firm_threshold": FIRM_THRESHOLD, "max_misses": FIRM_THRESHOLD, "assignment": "gnn"},
+    "tracker_predict": {
+        "firm_threshold": FIRM_THRESHOLD, "max_misses": FIRM_THRESHOLD, "alpha_beta": ALPHA_BETA, "max_speed": MAX_SPEED,
+    },
+    "tracker_mofn": {"confirmation": MofN(CONFIRM, DELETE)},
+}
+
+VARIANTS = {
+    "tr_inf": run_tr_inf,
+    "tr_in2": run_tr_in2,
+    "test_tr_in1": run_test_tr_in1,
+    "test_f": run_test_f,
+    **{name: functools.partial(run_tracker, options) for name, options in TRACKER_VARIANTS.items()},
+    "test_f_batch": run_test_f_batch,
+}
+
+DEFAULT_SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def measure(variant, scenario):
+    timer = StageTimer()
+    VARIANTS[variant](scenario, timer)
+    seconds = sum(timer.stages.values())
+
+    # Separate pass for memory, since tracemalloc slows the run down
+    tracemalloc.start()
+    VARIANTS[variant](scenario, StageTimer())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "plots": len(scenario.plots),
+        "seconds": seconds,
+        "plots_per_sec": len(scenario.plots) / seconds if seconds else None,
+        "peak_bytes": peak,
+        "stages": timer.stages,
+    }
+    if timer.breakdown is not None:
+        result["associate_stages"] = timer.breakdown
+    return result
+
+
+def run_benchmarks(variants, sizes, time_budget=60.0, seed=0, log=functools.partial(print, flush=True)):
+    # The legacy variants are quadratic in the plot count, so a size is skipped when the previous
+    # run scaled quadratically would take longer than time_budget seconds
+    results = []
+    previous = {}
+    for size in sizes:
+        start = time.perf_counter()
+        scenario = scenario_for_size(size, seed=seed)
+        generate_seconds = time.perf_counter() - start
+        for variant in variants:
+            if variant in previous:
+                last_size, last_seconds = previous[variant]
+                if last_seconds * (size / last_size) ** 2 > time_budget:
+                    results.append({"variant": variant, "size": size, "skipped": True})
+                    log(f"{variant:>16} {size:>9} plots: skipped")
+                    continue
+            result = {"variant": variant, "size": size, **measure(variant, scenario)}
+            result["stages"]["generate"] = generate_seconds
+            results.append(result)
+            previous[variant] = (size, result["seconds"])
+            line = (f"{variant:>16} {size:>9} plots: {result['plots_per_sec']:>12.0f} plots/s, "
+                    f"peak {result['peak_bytes'] / 2 ** 20:.1f} MiB")
+            if "associate_stages" in result:
+                line += " (" + ", ".join(
+                    f"{stage} {seconds:.3f} s" for stage, seconds in result["associate_stages"].items() if seconds
+                ) + ")"
+            log(line)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the initialize_tracks variants on synthetic scenarios.")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--time-budget", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.variants, args.sizes, time_budget=args.time_budget, seed=args.seed)
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
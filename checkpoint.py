@@ -0,0 +1,176 @@
+import gc
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from confirmation import MofN
+from gating import from_spec
+from track_store import COLUMNS
+from tracker import Tracker
+
+# File layout: HEADER_DTYPE | JSON metadata | arrays, each starting on an ALIGNMENT boundary
+# relative to the end of the metadata. The metadata holds the tracker configuration, its
+# counters and the name, dtype, shape and offset of every array.
+MAGIC = b"TRKSTATE"
+VERSION = 5
+ALIGNMENT = 64
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("metadata_size", "<u4")])
+CONFIG = (
+    "doppler_threshold", "range_threshold", "firm_threshold", "max_misses", "miss_rule", "assignment", "alpha_beta",
+    "process_noise", "max_speed",
+)
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def snapshot(tracker):
+    # Copies the tracker state at a scan boundary: (metadata, arrays) ready for write_checkpoint.
+    # Only the used prefix of the store columns is copied.
+    store = tracker.store
+    metadata = {name: getattr(tracker, name) for name in CONFIG}
+    metadata.update(
+        confirmation=None if tracker.confirmation is None else tracker.confirmation.rules(),
+        gating=tracker.gating.spec(),
+        plot_count=tracker.plot_count, scan_count=tracker.scan_count, size=store.size, next_id=store.next_id,
+        history_length=store.history_length, fields=store.fields,
+        initial_covariance=store.initial_covariance.tolist(),
+    )
+    arrays = {name: getattr(store, name)[:store.size].copy() for name in COLUMNS}
+    arrays["free_slots"] = np.array(store.free_slots, dtype=np.int64)
+    return metadata, arrays
+
+
+def write_checkpoint(path, metadata, arrays):
+    # Written beside the target and renamed, so a crash mid-write keeps the previous checkpoint
+    entries, offset = [], 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        entries.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset += array.nbytes
+    encoded = json.dumps(dict(metadata, arrays=entries)).encode()
+    header = np.array([(MAGIC, VERSION, len(encoded))], dtype=HEADER_DTYPE)
+    start = _aligned(HEADER_DTYPE.itemsize + len(encoded))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header.tobytes())
+        f.write(encoded)
+        for entry, array in zip(entries, arrays.values()):
+            f.seek(start + entry["offset"])
+            f.write(np.ascontiguousarray(array).data)
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path):
+    # Returns (metadata, arrays); the arrays are views of a single read of the file
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1) if len(data) >= HEADER_DTYPE.itemsize else []
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a tracker checkpoint")
+    if header["version"][0] != VERSION:
+        raise ValueError(f"{path} has unsupported checkpoint version {header['version'][0]}")
+    end = HEADER_DTYPE.itemsize + int(header["metadata_size"][0])
+    metadata = json.loads(data[HEADER_DTYPE.itemsize:end])
+    start = _aligned(end)
+    arrays = {}
+    for entry in metadata.pop("arrays"):
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        if count == 0:
+            # An empty last array is aligned past the end of the file
+            arrays[entry["name"]] = np.empty(entry["shape"], dtype=dtype)
+            continue
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=start + entry["offset"])
+        arrays[entry["name"]] = array.reshape(entry["shape"])
+    return metadata, arrays
+
+
+def restore(path, sink=None, metrics=None):
+    # Warm restart: a Tracker with the configuration, counters and tracks of the checkpoint.
+    # Firm tracks stay firm, so nothing has to be re-confirmed.
+    metadata, arrays = read_checkpoint(path)
+    config = {name: metadata[name] for name in CONFIG}
+    if config["alpha_beta"] is not None:
+        config["alpha_beta"] = tuple(config["alpha_beta"])
+    if metadata["confirmation"] is not None:
+        config["confirmation"] = MofN(*(None if rule is None else tuple(rule) for rule in metadata["confirmation"]))
+    tracker = Tracker(
+        **config, gating=from_spec(metadata["gating"]), covariance=metadata["initial_covariance"],
+        history_length=metadata["history_length"], sink=sink, metrics=metrics,
+    )
+    tracker.plot_count = metadata["plot_count"]
+    tracker.scan_count = metadata["scan_count"]
+
+    store = tracker.store
+    if metadata["fields"] != store.fields:
+        raise ValueError(f"{path} stores {metadata['fields']} plot fields, expected {store.fields}")
+    size = metadata["size"]
+    store._grow(size)
+    for name in COLUMNS:
+        getattr(store, name)[:size] = arrays[name]
+    store.size = size
+    store.next_id = metadata["next_id"]
+    store.free_slots = arrays["free_slots"].tolist()
+    # The index rebuild allocates a few small objects per track; the cyclic collector would
+    # otherwise rescan them over and over
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        store.rebuild_indexes()
+    finally:
+        if enabled:
+            gc.enable()
+    return tracker
+
+
+class Checkpointer:
+    # Drop-in wrapper of a Tracker's process_scan that checkpoints every `every` scans. The
+    # state is copied at the scan boundary and written on a background thread; if the previous
+    # write is still running the snapshot is skipped rather than queued.
+    def __init__(self, tracker, path, every=100):
+        if every < 1:
+            raise ValueError("every must be positive")
+        self.tracker = tracker
+        self.path = path
+        self.every = every
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+        self.written = 0
+        self.skipped = 0
+
+    def process_scan(self, batch):
+        events = self.tracker.process_scan(batch)
+        if self.tracker.scan_count % self.every == 0:
+            self.checkpoint()
+        return events
+
+    def checkpoint(self):
+        if self.pending is not None:
+            if not self.pending.done():
+                self.skipped += 1
+                return False
+            self.pending.result()
+        self.pending = self.executor.submit(write_checkpoint, self.path, *snapshot(self.tracker))
+        self.written += 1
+        return True
+
+    def close(self, final=True):
+        # Waits for the write in flight and, with final, writes the state as of now
+        if self.pending is not None:
+            self.pending.result()
+            self.pending = None
+        if final:
+            write_checkpoint(self.path, *snapshot(self.tracker))
+            self.written += 1
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def chi2_threshold(confidence, dim=3):
+    # Gate on squared Mahalanobis distance, so the chi-squared quantile is used as is. scipy.stats
+    # takes most of a second to import, so only callers that need a threshold pay for it.
+    from scipy.stats import chi2
+
+    return float(chi2.ppf(confidence, df=dim))
+
+
+def squared_mahalanobis(delta, cholesky):
+    # delta (..., d) against lower Cholesky factors (..., d, d): one batched forward
+    # substitution L y = delta, then |y|^2
+    solved = np.empty_like(delta)
+    for k in range(delta.shape[-1]):
+        partial = np.einsum("...j,...j->...", cholesky[..., k, :k], solved[..., :k])
+        solved[..., k] = (delta[..., k] - partial) / cholesky[..., k, k]
+    return np.einsum("...k,...k->...", solved, solved)
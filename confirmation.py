@@ -0,0 +1,74 @@
+import numpy as np
+
+from track_store import FIRM, TENTATIVE
+
+MAX_WINDOW = 64
+
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:
+    _BYTE_COUNTS = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+    def popcount(values):
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        return _BYTE_COUNTS[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _window(rule, name):
+    if rule is None:
+        return None
+    m, n = rule
+    if not 1 <= m <= n <= MAX_WINDOW:
+        raise ValueError(f"{name} must be (m, n) with 1 <= m <= n <= {MAX_WINDOW}, got {rule!r}")
+    return int(m), int(n), np.uint64((1 << n) - 1)
+
+
+class MofN:
+    # M-of-N track confirmation and deletion. Each track keeps its per-scan hit history as a
+    # bitmask in TrackStore.hit_mask, bit 0 being the latest scan, and every rule is a popcount
+    # over the low bits. A tentative track is confirmed with at least m hits in its last n scans
+    # (confirm), and deleted with at least m misses in its last n scans (delete). Firm tracks are
+    # deleted under firm_delete; None keeps them for good. Scans before a track existed are
+    # not counted as misses.
+    def __init__(self, confirm=(3, 5), delete=(3, 3), firm_delete=None):
+        self.confirm = _window(confirm, "confirm")
+        self.delete = _window(delete, "delete")
+        self.firm_delete = _window(firm_delete, "firm_delete")
+
+    def __repr__(self):
+        confirm, delete, firm_delete = self.rules()
+        return f"MofN(confirm={confirm}, delete={delete}, firm_delete={firm_delete})"
+
+    def rules(self):
+        # The (m, n) pairs this was built from
+        return tuple(None if rule is None else rule[:2] for rule in (self.confirm, self.delete, self.firm_delete))
+
+    def advance(self, store, hit_slots):
+        # Moves every live track on by one scan and records which ones were hit; tracks
+        # created afterwards start with a single hit
+        live = store.live_slots()
+        store.hit_mask[live] <<= np.uint64(1)
+        store.age[live] += 1
+        store.hit_mask[hit_slots] |= np.uint64(1)
+
+    def confirmed(self, store, slots):
+        # confirm=None never confirms, as firm_threshold=None does for the Tracker
+        if self.confirm is None:
+            return slots[:0]
+        m, _, window = self.confirm
+        slots = slots[store.status[slots] == TENTATIVE]
+        return slots[popcount(store.hit_mask[slots] & window) >= m]
+
+    def deleted(self, store, slots):
+        # The slots whose misses meet the deletion rule of their status
+        dead = np.zeros(len(slots), dtype=bool)
+        status = store.status[slots]
+        for rule, state in ((self.delete, TENTATIVE), (self.firm_delete, FIRM)):
+            if rule is None:
+                continue
+            m, n, window = rule
+            selected = status == state
+            observed = np.minimum(store.age[slots[selected]], n)
+            misses = observed - popcount(store.hit_mask[slots[selected]] & window)
+            dead[selected] = misses >= m
+        return slots[dead]
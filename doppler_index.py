@@ -0,0 +1,65 @@
+import bisect
+
+import numpy as np
+
+
+class DopplerIndex:
+    # Track-head Doppler values kept sorted, so the |d1 - d2| < doppler_threshold candidates
+    # of a measurement are one contiguous run found by two bisections
+    def __init__(self):
+        self.values = []
+        self.ids = []
+        self.track_values = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _position(self, track_id, value):
+        position = bisect.bisect_left(self.values, value)
+        while self.ids[position] != track_id:
+            position += 1
+        return position
+
+    def insert(self, track_ids, doppler):
+        # Also used to move existing tracks to their new Doppler value
+        if not self.ids:
+            # Filling an empty index takes one sort instead of a list insertion per track
+            track_ids, doppler = np.ravel(track_ids), np.ravel(doppler)
+            order = np.argsort(doppler, kind="stable")
+            self.values = doppler[order].tolist()
+            self.ids = track_ids[order].tolist()
+            self.track_values = dict(zip(track_ids.tolist(), doppler.tolist()))
+            return
+        for track_id, value in zip(np.ravel(track_ids).tolist(), np.ravel(doppler).tolist()):
+            old_value = self.track_values.get(track_id)
+            if old_value == value:
+                continue
+            if old_value is not None:
+                position = self._position(track_id, old_value)
+                del self.values[position]
+                del self.ids[position]
+            position = bisect.bisect_right(self.values, value)
+            self.values.insert(position, value)
+            self.ids.insert(position, track_id)
+            self.track_values[track_id] = value
+
+    update = insert
+
+    def remove(self, track_ids):
+        for track_id in np.ravel(track_ids).tolist():
+            value = self.track_values.pop(track_id, None)
+            if value is not None:
+                position = self._position(track_id, value)
+                del self.values[position]
+                del self.ids[position]
+
+    def query(self, doppler, doppler_threshold):
+        # Candidate track ids for each Doppler value; the window is widened slightly so
+        # rounding never drops a pair, and callers re-check the exact gate
+        margin = doppler_threshold * (1 + 1e-9)
+        candidates = []
+        for value in np.ravel(doppler).tolist():
+            low = bisect.bisect_left(self.values, value - margin)
+            high = bisect.bisect_right(self.values, value + margin)
+            candidates.append(np.array(self.ids[low:high], dtype=np.intp))
+        return candidates
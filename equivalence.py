@@ -0,0 +1,119 @@
+import argparse
+import sys
+
+import numpy as np
+
+import presets
+import test_f
+import test_tr_in1
+import tr_in2
+import tr_inf
+from chi2_gating import chi2_threshold
+from events import ASSIGNED, INITIATED, RecordSink
+from scenario import scenario_for_size
+
+# Differential check of the gating pipeline: every script's initialize_tracks against its
+# preset Tracker on randomized scenarios and thresholds, fed one plot per scan
+SCRIPTS = ("tr_inf", "tr_in2", "test_tr_in1", "test_f")
+
+
+def random_case(rng, max_plots):
+    n_plots = int(rng.integers(10, max_plots + 1))
+    scenario = scenario_for_size(n_plots, n_scans=int(rng.integers(2, 20)), seed=int(rng.integers(1 << 31)))
+    params = {
+        "doppler_threshold": float(rng.uniform(0.5, 5.0)),
+        "range_threshold": float(rng.uniform(2.0, 30.0)),
+        "firm_threshold": int(rng.integers(2, 6)),
+        "chi2_threshold": chi2_threshold(float(rng.uniform(0.5, 0.99))),
+        "cov_matrix": np.diag(rng.uniform(0.5, 4.0, size=3)),
+    }
+    return scenario.plots, params
+
+
+def run_preset(tracker, plots):
+    for index in range(len(plots)):
+        tracker.process_scan(plots[index:index + 1])
+
+
+def labels_from_records(records, n_plots):
+    records = records[(records["code"] == ASSIGNED) | (records["code"] == INITIATED)]
+    labels = np.full(n_plots, -1, dtype=np.int64)
+    labels[records["measurement"]] = records["track_id"]
+    return labels
+
+
+def compare_events(name, plots, params):
+    # Legacy and preset event streams, record for record
+    measurements = [tuple(row) for row in plots.tolist()]
+    legacy, engine = RecordSink(), RecordSink()
+    d, r = params["doppler_threshold"], params["range_threshold"]
+    if name == "test_tr_in1":
+        test_tr_in1.initialize_tracks(measurements, d, r, sink=legacy)
+        tracker = presets.test_tr_in1(d, r, sink=engine)
+    else:
+        module = tr_inf if name == "tr_inf" else tr_in2
+        module.initialize_tracks(measurements, d, r, params["firm_threshold"], sink=legacy)
+        tracker = getattr(presets, name)(d, r, params["firm_threshold"], sink=engine)
+    run_preset(tracker, plots)
+    return legacy.records, engine.records
+
+
+def compare_test_f(plots, params):
+    # test_f reports track memberships rather than events; both sides become per-plot labels
+    converted = [test_f.sph2cart(az, el, r) + (doppler,) for az, el, r, doppler, _ in plots.tolist()]
+    tracks = test_f.initialize_tracks(
+        converted, np.linalg.inv(params["cov_matrix"]), params["chi2_threshold"], params["doppler_threshold"],
+        params["range_threshold"],
+    )[0]
+    position = {id(measurement): index for index, measurement in enumerate(converted)}
+    legacy = np.full(len(plots), -1, dtype=np.int64)
+    for track_id, track in enumerate(tracks):
+        legacy[[position[id(measurement)] for measurement in track]] = track_id
+
+    sink = RecordSink()
+    tracker = presets.test_f(
+        params["doppler_threshold"], params["range_threshold"], params["chi2_threshold"], params["cov_matrix"],
+        history_length=max(len(plots), 1), sink=sink,
+    )
+    run_preset(tracker, plots)
+    return legacy, labels_from_records(sink.records, len(plots))
+
+
+def check(name, plots, params):
+    # None when both engines agree, otherwise a description of the first difference
+    if name == "test_f":
+        legacy, engine = compare_test_f(plots, params)
+    else:
+        legacy, engine = compare_events(name, plots, params)
+    if len(legacy) == len(engine) and np.array_equal(legacy, engine):
+        return None
+    common = min(len(legacy), len(engine))
+    differs = np.flatnonzero(legacy[:common] != engine[:common])
+    at = int(differs[0]) if len(differs) else common
+    return (
+        f"{len(legacy)} legacy vs {len(engine)} engine entries, first difference at {at}: "
+        f"{legacy[at] if at < len(legacy) else None} vs {engine[at] if at < len(engine) else None}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the preset Trackers against the legacy scripts.")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--max-plots", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scripts", nargs="+", choices=SCRIPTS, default=list(SCRIPTS))
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    for trial in range(args.trials):
+        plots, params = random_case(rng, args.max_plots)
+        for name in args.scripts:
+            mismatch = check(name, plots, params)
+            if mismatch is not None:
+                settings = {key: value for key, value in params.items() if key != "cov_matrix"}
+                print(f"{name}: FAIL at trial {trial} ({len(plots)} plots, {settings}): {mismatch}")
+                sys.exit(1)
+    print(f"{', '.join(args.scripts)}: ok ({args.trials} trials identical)")
+
+if __name__ == "__main__":
+    main()
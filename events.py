@@ -0,0 +1,170 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Event codes
+ASSIGNED = 1
+INITIATED = 2
+FIRMED = 3
+DELETED = 4
+
+# Gate bits of an ASSIGNED event
+DOPPLER_GATE = 1
+RANGE_GATE = 2
+
+# Levels, ordered like the logging module's
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+EVENT_LEVELS = np.array([0, DEBUG, INFO, INFO, WARNING], dtype=np.int8)
+
+# measurement is the running index of the plot over everything processed, -1 for deletions
+EVENT_DTYPE = np.dtype([("code", np.uint8), ("track_id", np.int64), ("measurement", np.int64), ("gates", np.uint8)])
+Event = namedtuple("Event", EVENT_DTYPE.names)
+
+
+def make_records(codes, track_ids, measurements, gates=0):
+    records = np.empty(len(codes), dtype=EVENT_DTYPE)
+    records["code"] = codes
+    records["track_id"] = track_ids
+    records["measurement"] = measurements
+    records["gates"] = gates
+    return records
+
+
+# Reason given for an assignment, by its gate bits
+GATE_MESSAGES = {
+    DOPPLER_GATE | RANGE_GATE: "Both Doppler and Range conditions satisfied.",
+    DOPPLER_GATE: "Doppler condition satisfied.",
+    RANGE_GATE: "Range condition satisfied.",
+}
+
+
+def format_event(code, track_id, index, gates, measurement=None, messages=GATE_MESSAGES):
+    plot = f"#{index}" if measurement is None else measurement
+    if code == INITIATED:
+        return f"Measurement {plot} initiated a new Track ID {track_id}."
+    if code == FIRMED:
+        return f"Track ID {track_id} is now firm."
+    if code == DELETED:
+        return f"Track ID {track_id} has too many misses and will be removed."
+    if gates in messages:
+        return f"Measurement {plot} assigned to Track ID {track_id}: {messages[gates]}"
+    return f"Measurement {plot} assigned to Track ID {track_id}."
+
+
+class NullSink:
+    # Discards everything; producers check enabled and skip building records altogether
+    enabled = False
+    level = WARNING + 1
+
+    def emit(self, records):
+        pass
+
+    def emit_event(self, code, track_id, measurement, gates=0):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RecordSink:
+    # Keeps events as a compact structured array; nothing is formatted until format() is called
+    enabled = True
+
+    def __init__(self, level=DEBUG, capacity=1024):
+        self.level = level
+        self.buffer = np.empty(capacity, dtype=EVENT_DTYPE)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def records(self):
+        return self.buffer[:self.count]
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        if needed > len(self.buffer):
+            capacity = len(self.buffer)
+            while capacity < needed:
+                capacity *= 2
+            buffer = np.empty(capacity, dtype=EVENT_DTYPE)
+            buffer[:self.count] = self.records
+            self.buffer = buffer
+
+    def emit(self, records):
+        records = records[EVENT_LEVELS[records["code"]] >= self.level]
+        self._reserve(len(records))
+        self.buffer[self.count:self.count + len(records)] = records
+        self.count += len(records)
+
+    def emit_event(self, code, track_id, measurement, gates=0):
+        if EVENT_LEVELS[code] < self.level:
+            return
+        self._reserve(1)
+        self.buffer[self.count] = (code, track_id, measurement, gates)
+        self.count += 1
+
+    def format(self, measurements=None, messages=GATE_MESSAGES):
+        # measurements, if given, maps a running plot index to the plot it refers to
+        return [
+            format_event(
+                code, track_id, index, gates, None if measurements is None or index < 0 else measurements[index],
+                messages,
+            )
+            for code, track_id, index, gates in self.records.tolist()
+        ]
+
+    def clear(self):
+        self.count = 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileSink(RecordSink):
+    # Buffers records and writes them formatted, batch_size events at a time; messages replaces
+    # the reasons given for assignments
+    def __init__(self, file, level=INFO, batch_size=4096, measurements=None, messages=GATE_MESSAGES):
+        super().__init__(level=level, capacity=batch_size)
+        self.batch_size = batch_size
+        self.measurements = measurements
+        self.messages = messages
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "a") if self.owns_file else file
+
+    def emit(self, records):
+        super().emit(records)
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def emit_event(self, code, track_id, measurement, gates=0):
+        super().emit_event(code, track_id, measurement, gates)
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            self.file.write("\n".join(self.format(self.measurements, self.messages)) + "\n")
+            self.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,355 @@
+import numpy as np
+
+from chi2_gating import squared_mahalanobis
+from events import DOPPLER_GATE, RANGE_GATE
+from metrics import NULL_METRICS
+from scan_gating import sph2cart
+
+# What a leaf gate compares a measurement with: the track head, or every plot kept in the
+# track's history, the leaf passing if any of them does
+HEAD = "head"
+HISTORY = "history"
+# Most time slices a scan is split into for index lookups against predicted heads
+MAX_SLICES = 8
+
+
+class Lookup:
+    # Index queries for one batch of measurements; each index is queried at most once. Heads
+    # may move up to drift from their indexed position by the measurement times, except the
+    # fast slots, which are candidates of every measurement.
+    def __init__(self, store, meas_xyz, meas_doppler, drift=0.0, fast=()):
+        self.store = store
+        self.meas_xyz = meas_xyz
+        self.meas_doppler = meas_doppler
+        self.drift = drift
+        self.fast = np.asarray(fast, dtype=np.intp)
+        self.cache = {}
+
+    def nearby(self, radius):
+        # Pairs within radius of a head, or None if the grid cannot bound that radius
+        grid = self.store.grid
+        if grid is None or grid.cell_size < radius + self.drift:
+            return None
+        if "nearby" not in self.cache:
+            rows, cols = _flatten(grid.query(self.meas_xyz))
+            if len(self.fast):
+                fast = np.zeros(len(self.store), dtype=bool)
+                fast[self.fast] = True
+                keep = ~fast[cols]
+                rows = np.concatenate((rows[keep], np.repeat(np.arange(len(self.meas_xyz)), len(self.fast))))
+                cols = np.concatenate((cols[keep], np.tile(self.fast, len(self.meas_xyz))))
+            self.cache["nearby"] = rows, cols
+        return self.cache["nearby"]
+
+    def doppler(self, threshold):
+        if self.store.doppler_index is None:
+            return None
+        key = ("doppler", threshold)
+        if key not in self.cache:
+            self.cache[key] = _flatten(self.store.doppler_index.query(self.meas_doppler, threshold))
+        return self.cache[key]
+
+
+class Pairs:
+    # Candidate (measurement, slot) pairs of one scan; differences shared by several leaves
+    # are computed on first use. bits collects the DOPPLER_GATE and RANGE_GATE bits passed.
+    # With meas_time each head is predicted to the time of the measurement it is paired with.
+    def __init__(self, store, meas_xyz, meas_doppler, rows, cols, meas_time=None):
+        self.store = store
+        self.meas_xyz = meas_xyz
+        self.meas_doppler = meas_doppler
+        self.meas_time = meas_time
+        self.rows = rows
+        self.cols = cols
+        self.bits = np.zeros(len(rows), dtype=np.uint8)
+        self.cache = {}
+
+    def delta(self, over):
+        # Measurement minus reference position: (P, 3) for the head, (P, history_length, 3)
+        key = ("delta", over)
+        if key not in self.cache:
+            if over == HEAD and self.meas_time is None:
+                self.cache[key] = self.meas_xyz[self.rows] - self.store.xyz[self.cols]
+            elif over == HEAD:
+                self.cache[key] = self.meas_xyz[self.rows] - self.store.head_at(self.cols, self.meas_time[self.rows])
+            else:
+                history = self.store.history[self.cols]
+                xyz = np.stack(sph2cart(history[..., 0], history[..., 1], history[..., 2]), axis=-1)
+                self.cache[key] = self.meas_xyz[self.rows, None] - xyz
+        return self.cache[key]
+
+    def doppler_difference(self, over):
+        key = ("doppler", over)
+        if key not in self.cache:
+            if over == HEAD:
+                self.cache[key] = np.abs(self.meas_doppler[self.rows] - self.store.doppler[self.cols])
+            else:
+                self.cache[key] = np.abs(self.meas_doppler[self.rows, None] - self.store.history[self.cols, :, 3])
+        return self.cache[key]
+
+    def cholesky(self, over):
+        cholesky = self.store.cholesky[self.cols]
+        return cholesky if over == HEAD else cholesky[:, None]
+
+
+def _reduce(passed, over):
+    # Unused history entries are NaN and never pass
+    return passed if over == HEAD else passed.any(axis=1)
+
+
+def _check_over(over):
+    if over not in (HEAD, HISTORY):
+        raise ValueError(f"over must be {HEAD!r} or {HISTORY!r}, got {over!r}")
+    return over
+
+
+class Gate:
+    # A vectorized predicate over candidate pairs. Gates compose with & (AllOf), | (AnyOf) and
+    # ~ (Not); every gate is evaluated on all candidates, so the reported bits are complete.
+    bit = 0
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def candidates(self, lookup):
+        # (rows, slots) including every pair that can pass, or None to check every live track
+        return None
+
+    def reach(self):
+        # Bound on the distance from a plot to the track plot (head or history) of any pair that
+        # can pass, or None when the gate can pass pairs at any distance
+        return None
+
+    def lookup(self, store, meas_xyz, meas_doppler, meas_time=None, metrics=NULL_METRICS):
+        # Candidates of the whole scan. Heads are predicted to the middle of up to MAX_SLICES
+        # time slices of the scan and the index queried per slice, so a head moves at most
+        # half a grid cell from its indexed position by the time of any plot of its slice.
+        # Slices are sized for the 99th percentile speed; faster tracks are candidates of
+        # every plot.
+        if meas_time is None or store.grid is None or len(meas_xyz) == 0:
+            return self.candidates(Lookup(store, meas_xyz, meas_doppler))
+        live = store.live_slots()
+        speed = np.sqrt(np.einsum("ij,ij->i", store.velocity[live], store.velocity[live]))
+        start, span = float(meas_time.min()), float(np.ptp(meas_time))
+        budget = store.grid.cell_size / 2
+        typical = float(np.percentile(speed, 99)) if len(speed) else 0.0
+        n_slices = min(max(int(np.ceil(typical * span / (2 * budget))), 1), MAX_SLICES)
+        width = span / n_slices
+        slow = speed * width / 2 <= budget
+        fast, drift = live[~slow], speed[slow].max(initial=0.0) * width / 2
+        slices = np.zeros(len(meas_time), dtype=np.intp)
+        if width:
+            slices = np.minimum(((meas_time - start) / width).astype(np.intp), n_slices - 1)
+        found = []
+        for index in np.unique(slices).tolist():
+            rows = np.flatnonzero(slices == index)
+            store.predict(start + (index + 0.5) * width)
+            if metrics.enabled:
+                metrics.lap("predict")
+            candidates = self.candidates(Lookup(store, meas_xyz[rows], meas_doppler[rows], drift, fast))
+            if candidates is None:
+                return None
+            found.append((rows[candidates[0]], candidates[1]))
+        return np.concatenate([rows for rows, _ in found]), np.concatenate([cols for _, cols in found])
+
+    def pairs(self, store, meas_xyz, meas_doppler, metrics=NULL_METRICS, meas_time=None):
+        # Pairs passing the gate as (rows, slots, bits), sorted by measurement then track id
+        # (creation order, as in the legacy loops). With meas_time, heads are gated at their
+        # constant-velocity prediction to each measurement's time.
+        candidates = self.lookup(store, meas_xyz, meas_doppler, meas_time, metrics)
+        if candidates is None:
+            live = store.live_slots()
+            rows, cols = np.repeat(np.arange(len(meas_xyz)), len(live)), np.tile(live, len(meas_xyz))
+        else:
+            rows, cols = candidates
+        if metrics.enabled:
+            metrics.lap("lookup")
+            metrics.count("candidates", len(rows))
+            metrics.candidates(np.bincount(rows, minlength=len(meas_xyz)))
+
+        pairs = Pairs(store, meas_xyz, meas_doppler, rows, cols, meas_time)
+        passed = self.evaluate(pairs)
+        rows, cols, bits = rows[passed], cols[passed], pairs.bits[passed]
+        order = np.lexsort((store.track_id[cols], rows))
+        if metrics.enabled:
+            metrics.lap("gate")
+            metrics.count("gated_pairs", len(rows))
+        return rows[order], cols[order], bits[order]
+
+
+class DopplerGate(Gate):
+    bit = DOPPLER_GATE
+
+    def __init__(self, threshold, over=HEAD):
+        self.threshold = threshold
+        self.over = _check_over(over)
+
+    def spec(self):
+        return ["doppler", self.threshold, self.over]
+
+    def candidates(self, lookup):
+        return lookup.doppler(self.threshold) if self.over == HEAD else None
+
+    def evaluate(self, pairs):
+        passed = _reduce(pairs.doppler_difference(self.over) < self.threshold, self.over)
+        pairs.bits[passed] |= self.bit
+        return passed
+
+
+class RangeGate(Gate):
+    bit = RANGE_GATE
+
+    def __init__(self, threshold, over=HEAD):
+        self.threshold = threshold
+        self.over = _check_over(over)
+
+    def spec(self):
+        return ["range", self.threshold, self.over]
+
+    def reach(self):
+        return self.threshold
+
+    def candidates(self, lookup):
+        return lookup.nearby(self.threshold) if self.over == HEAD else None
+
+    def evaluate(self, pairs):
+        delta = pairs.delta(self.over)
+        passed = _reduce(np.sqrt(np.einsum("...i,...i->...", delta, delta)) < self.threshold, self.over)
+        pairs.bits[passed] |= self.bit
+        return passed
+
+
+class MahalanobisGate(Gate):
+    # Squared Mahalanobis distance under each track's covariance below limit; squared=False
+    # compares the distance itself, as test_f.initialize_tracks does
+    def __init__(self, limit, over=HEAD, squared=True):
+        self.limit = limit
+        self.over = _check_over(over)
+        self.squared = squared
+
+    def spec(self):
+        return ["mahalanobis", self.limit, self.over, self.squared]
+
+    def candidates(self, lookup):
+        # The largest covariance eigenvalue, bounded by the trace, bounds the distance to the
+        # head of any pair that can pass
+        store = lookup.store
+        live = store.live_slots()
+        if self.over != HEAD or len(live) == 0:
+            return None
+        spread = float(np.trace(store.covariance[live], axis1=1, axis2=2).max())
+        radius = np.sqrt(self.limit * spread) if self.squared else self.limit * np.sqrt(spread)
+        return lookup.nearby(radius)
+
+    def evaluate(self, pairs):
+        distance = squared_mahalanobis(pairs.delta(self.over), pairs.cholesky(self.over))
+        if not self.squared:
+            distance = np.sqrt(distance)
+        return _reduce(distance < self.limit, self.over)
+
+
+class AllOf(Gate):
+    def __init__(self, *gates):
+        self.gates = gates
+
+    def spec(self):
+        return ["all"] + [gate.spec() for gate in self.gates]
+
+    def candidates(self, lookup):
+        # Pairs passing all members are in the candidates of each one, so the smallest set is
+        # enough; evaluating every member on it leaves their intersection
+        found = [pairs for pairs in (gate.candidates(lookup) for gate in self.gates) if pairs is not None]
+        return min(found, key=lambda pairs: len(pairs[0])) if found else None
+
+    def reach(self):
+        found = [reach for reach in (gate.reach() for gate in self.gates) if reach is not None]
+        return min(found) if found else None
+
+    def evaluate(self, pairs):
+        return np.logical_and.reduce([gate.evaluate(pairs) for gate in self.gates])
+
+
+class AnyOf(Gate):
+    def __init__(self, *gates):
+        self.gates = gates
+
+    def spec(self):
+        return ["any"] + [gate.spec() for gate in self.gates]
+
+    def candidates(self, lookup):
+        found = [gate.candidates(lookup) for gate in self.gates]
+        if any(pairs is None for pairs in found):
+            return None
+        rows = np.concatenate([rows for rows, _ in found])
+        cols = np.concatenate([cols for _, cols in found])
+        stride = max(len(lookup.store), 1)
+        return np.divmod(np.unique(rows * stride + cols), stride)
+
+    def reach(self):
+        found = [gate.reach() for gate in self.gates]
+        return None if any(reach is None for reach in found) else max(found)
+
+    def evaluate(self, pairs):
+        return np.logical_or.reduce([gate.evaluate(pairs) for gate in self.gates])
+
+
+class Not(Gate):
+    def __init__(self, gate):
+        self.gate = gate
+
+    def spec(self):
+        return ["not", self.gate.spec()]
+
+    def evaluate(self, pairs):
+        return ~self.gate.evaluate(pairs)
+
+
+def _flatten(candidates):
+    # Per-measurement candidate arrays to flat (rows, slots)
+    rows = np.repeat(np.arange(len(candidates)), [len(ids) for ids in candidates])
+    cols = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.intp)
+    return rows, cols
+
+
+def from_spec(spec):
+    # Inverse of Gate.spec(), for gates stored as JSON
+    kind, arguments = spec[0], spec[1:]
+    if kind == "doppler":
+        return DopplerGate(*arguments)
+    if kind == "range":
+        return RangeGate(*arguments)
+    if kind == "mahalanobis":
+        return MahalanobisGate(*arguments)
+    if kind == "all":
+        return AllOf(*map(from_spec, arguments))
+    if kind == "any":
+        return AnyOf(*map(from_spec, arguments))
+    if kind == "not":
+        return Not(from_spec(arguments[0]))
+    raise ValueError(f"unknown gate {kind!r}")
+
+
+# Presets reproducing the gating of each script
+
+def or_gate(doppler_threshold, range_threshold):
+    # tr_inf, tr_in2 and test_tr_in1: either gate against the track head
+    return DopplerGate(doppler_threshold) | RangeGate(range_threshold)
+
+
+def chi2_gate(doppler_threshold, range_threshold, chi2_limit):
+    # test_f.initialize_tracks_batch: Doppler, then range or squared Mahalanobis, against the head
+    return DopplerGate(doppler_threshold) & (RangeGate(range_threshold) | MahalanobisGate(chi2_limit))
+
+
+def test_f_gate(doppler_threshold, range_threshold, chi2_threshold):
+    # test_f.initialize_tracks: the same rule, but each gate passes on any plot of the track
+    # and the Mahalanobis distance is compared with chi2_threshold without squaring
+    return DopplerGate(doppler_threshold, over=HISTORY) & (
+        RangeGate(range_threshold, over=HISTORY) | MahalanobisGate(chi2_threshold, over=HISTORY, squared=False)
+    )
@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from checkpoint import Checkpointer, restore
+from metrics import Metrics
+from recording import COLUMNS, PLOT_DTYPE, plot_rows
+from scan_assembler import ScanAssembler
+from scenario import scenario_for_size
+from tracker import Tracker
+
+# Datagrams carry whole plot rows in the recording layout (little-endian float64 COLUMNS).
+# Decoded plots get their arrival time appended as an extra column, so end-to-end latency
+# can be measured per plot once its scan has been processed.
+ARRIVAL = len(COLUMNS)
+MAX_DATAGRAM = 65507
+POLICIES = ("block", "drop", "oldest")
+
+
+class BoundedQueue:
+    # Fixed-capacity queue between the asyncio stages. When full, "drop" discards the incoming
+    # item, "oldest" evicts the oldest queued one and "block" makes put() wait for space.
+    def __init__(self, capacity, policy="drop"):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}")
+        self.capacity = capacity
+        self.policy = policy
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.readable = asyncio.Event()
+        self.writable = asyncio.Event()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put_nowait(self, item):
+        # Returns False if the item was dropped; "block" queues drop like "drop" ones here
+        if len(self.items) >= self.capacity:
+            self.dropped += 1
+            if self.policy != "oldest":
+                return False
+            self.items.popleft()
+        self.items.append(item)
+        self.readable.set()
+        return True
+
+    async def put(self, item):
+        while self.policy == "block" and len(self.items) >= self.capacity:
+            self.writable.clear()
+            await self.writable.wait()
+        return self.put_nowait(item)
+
+    async def get(self, limit=None):
+        # Waits for at least one item and returns up to limit of them; an empty list means the
+        # queue is closed and drained
+        while not self.items and not self.closed:
+            self.readable.clear()
+            await self.readable.wait()
+        count = len(self.items) if limit is None else min(limit, len(self.items))
+        items = [self.items.popleft() for _ in range(count)]
+        self.writable.set()
+        return items
+
+    def close(self):
+        self.closed = True
+        self.readable.set()
+
+
+class LatencyCounter:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        seconds = np.asarray(seconds, dtype=float)
+        if seconds.size:
+            self.count += seconds.size
+            self.total += float(seconds.sum())
+            self.maximum = max(self.maximum, float(seconds.max()))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class _PlotProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.received(data)
+
+
+class IngestServer:
+    # UDP front end for a Tracker. The socket callback only timestamps and queues datagrams;
+    # a decoder task turns everything queued into plots in one go and assembles scans, and an
+    # engine task runs each scan through the tracker on a worker thread, so decoding the next
+    # datagrams overlaps with association. A window larger than max_batch is queued as several
+    # batches, which the engine joins back into one scan. Overload sheds datagrams at the socket queue: with
+    # the default scan_policy="block" a lagging engine holds the decoder back until it catches up.
+    def __init__(self, tracker, window=1.0, max_lateness=0.0, max_batch=4096, queue_size=4096, policy="oldest",
+                 scan_queue_size=8, scan_policy="block"):
+        if policy == "block":
+            raise ValueError("the datagram queue cannot block the socket; use 'drop' or 'oldest'")
+        self.tracker = tracker
+        self.assembler = ScanAssembler(window, max_lateness=max_lateness, max_batch=max_batch)
+        self.datagrams = BoundedQueue(queue_size, policy)
+        self.scans = BoundedQueue(scan_queue_size, scan_policy)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.latency = LatencyCounter()
+        self.received_datagrams = 0
+        self.malformed = 0
+        self.decoded_plots = 0
+        self.processed_plots = 0
+        self.processed_scans = 0
+        self.transport = None
+        self.address = None
+        self.tasks = []
+
+    async def start(self, host="127.0.0.1", port=0):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: _PlotProtocol(self), local_addr=(host, port))
+        self.address = self.transport.get_extra_info("sockname")
+        self.tasks = [asyncio.create_task(self._decode()), asyncio.create_task(self._engine())]
+        return self.address
+
+    async def stop(self):
+        # Stops receiving, then processes what is queued including the last partial scan
+        if self.transport is not None:
+            self.transport.close()
+        self.datagrams.close()
+        await asyncio.gather(*self.tasks)
+        self.executor.shutdown()
+
+    def received(self, data):
+        self.received_datagrams += 1
+        self.datagrams.put_nowait((time.perf_counter(), data))
+
+    def decode(self, datagrams):
+        # (arrival, payload) pairs to (N, len(COLUMNS) + 1) plots; datagrams that are not a whole
+        # number of plot rows are counted and skipped
+        valid = [(arrival, data) for arrival, data in datagrams if data and len(data) % PLOT_DTYPE.itemsize == 0]
+        self.malformed += len(datagrams) - len(valid)
+        if not valid:
+            return np.empty((0, ARRIVAL + 1))
+        plots = np.frombuffer(b"".join(data for _, data in valid), dtype="<f8").reshape(-1, ARRIVAL)
+        counts = [len(data) // PLOT_DTYPE.itemsize for _, data in valid]
+        arrivals = np.repeat([arrival for arrival, _ in valid], counts)
+        return np.column_stack((plots, arrivals))
+
+    async def _decode(self):
+        while True:
+            datagrams = await self.datagrams.get()
+            if not datagrams:
+                break
+            plots = self.decode(datagrams)
+            self.decoded_plots += len(plots)
+            for batch in self.assembler.extend(plots):
+                await self.scans.put(batch)
+        for batch in self.assembler.flush():
+            await self.scans.put(batch)
+        self.scans.close()
+
+    async def _engine(self):
+        # Batches of a window are held until its last one; if that one was shed from the queue,
+        # the window is processed with what arrived once a batch of a later window shows up
+        pending, window = [], None
+        while True:
+            batches = await self.scans.get(limit=1)
+            if not batches:
+                break
+            batch = batches[0]
+            if pending and batch.window != window:
+                await self._process(pending)
+                pending = []
+            pending.append(batch.plots)
+            window = batch.window
+            if batch.last:
+                await self._process(pending)
+                pending = []
+        if pending:
+            await self._process(pending)
+
+    async def _process(self, chunks):
+        scan = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.tracker.process_scan, scan[:, :ARRIVAL])
+        self.latency.record(time.perf_counter() - scan[:, ARRIVAL])
+        self.processed_plots += len(scan)
+        self.processed_scans += 1
+
+    def stats(self):
+        return {
+            "datagrams": self.received_datagrams,
+            "dropped_datagrams": self.datagrams.dropped,
+            "malformed_datagrams": self.malformed,
+            "plots": self.decoded_plots,
+            "late_plots": self.assembler.dropped,
+            "dropped_scans": self.scans.dropped,
+            "processed_plots": self.processed_plots,
+            "processed_scans": self.processed_scans,
+            "latency_mean": self.latency.mean,
+            "latency_max": self.latency.maximum,
+        }
+
+
+async def send_traffic(host, port, plots, rate=None, plots_per_datagram=64):
+    # Loopback traffic generator: sends plots in datagrams of plots_per_datagram rows, paced at
+    # rate plots per second, or as fast as the event loop allows when rate is None
+    step = plots_per_datagram * PLOT_DTYPE.itemsize
+    if not 0 < step <= MAX_DATAGRAM:
+        raise ValueError(f"plots_per_datagram must be between 1 and {MAX_DATAGRAM // PLOT_DTYPE.itemsize}")
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+    payload = memoryview(plot_rows(plots).tobytes())
+    start = time.perf_counter()
+    sent = 0
+    try:
+        for offset in range(0, len(payload), step):
+            transport.sendto(payload[offset:offset + step])
+            sent += 1
+            delay = 0.0
+            if rate is not None:
+                delay = min(offset + step, len(payload)) / PLOT_DTYPE.itemsize / rate - (time.perf_counter() - start)
+            # Always yield, so a server on the same loop gets to read the socket
+            await asyncio.sleep(max(delay, 0.0))
+    finally:
+        transport.close()
+    return sent
+
+
+def format_stats(stats):
+    return ", ".join(
+        f"{name} {value * 1e3:.1f} ms" if name.startswith("latency") else f"{name} {value}"
+        for name, value in stats.items()
+    )
+
+
+async def load_test(args):
+    scenario = scenario_for_size(args.plots, seed=args.seed)
+    server = IngestServer(make_tracker(args), **server_options(args))
+    host, port = await server.start(args.host, 0)
+    start = time.perf_counter()
+    sent = await send_traffic(host, port, scenario.plots, rate=args.rate, plots_per_datagram=args.plots_per_datagram)
+    await asyncio.sleep(0.1)
+    await server.stop()
+    seconds = time.perf_counter() - start
+    print(f"sent {len(scenario.plots)} plots in {sent} datagrams, {seconds:.2f} s "
+          f"({server.processed_plots / seconds:.0f} plots/s processed)")
+    print(format_stats(server.stats()))
+
+
+async def serve(args):
+    metrics = Metrics(scan_csv=args.metrics_csv) if args.metrics_csv or args.prometheus else None
+    tracker = None
+    if args.checkpoint:
+        # Warm restart from the last checkpoint, if there is one
+        if os.path.exists(args.checkpoint):
+            tracker = restore(args.checkpoint, metrics=metrics)
+            print(f"restored {len(tracker.store.slots)} tracks from {args.checkpoint}", flush=True)
+        tracker = Checkpointer(tracker or make_tracker(args, metrics), args.checkpoint, every=args.checkpoint_every)
+    server = IngestServer(tracker or make_tracker(args, metrics), **server_options(args))
+    host, port = await server.start(args.host, args.port)
+    print(f"listening on {host}:{port}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            print(format_stats(server.stats()), flush=True)
+            if args.prometheus:
+                metrics.write_prometheus(args.prometheus)
+    finally:
+        await server.stop()
+        if args.checkpoint:
+            tracker.close()
+        if metrics is not None:
+            metrics.close()
+
+
+async def send(args):
+    scenario = scenario_for_size(args.plots, seed=args.seed)
+    sent = await send_traffic(args.host, args.port, scenario.plots, rate=args.rate,
+                              plots_per_datagram=args.plots_per_datagram)
+    print(f"sent {len(scenario.plots)} plots in {sent} datagrams")
+
+
+def make_tracker(args, metrics=None):
+    return Tracker(
+        args.doppler_threshold, args.range_threshold, firm_threshold=args.firm_threshold, max_misses=args.firm_threshold,
+        metrics=metrics,
+    )
+
+
+def server_options(args):
+    return {
+        "window": args.window, "max_lateness": args.max_lateness, "queue_size": args.queue_size,
+        "policy": args.policy, "scan_queue_size": args.scan_queue_size, "scan_policy": args.scan_policy,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the tracker behind a UDP plot ingestion server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("serve", help="receive plots until interrupted")
+    run.add_argument("--port", type=int, default=9999)
+    run.add_argument("--report", type=float, default=5.0, help="seconds between statistics lines")
+    run.add_argument("--metrics-csv", default=None, help="write per-scan tracker metrics to this CSV file")
+    run.add_argument("--prometheus", default=None, help="rewrite this Prometheus textfile at every report")
+    run.add_argument("--checkpoint", default=None, help="restore from and periodically save tracker state to this file")
+    run.add_argument("--checkpoint-every", type=int, default=100, help="scans between checkpoints")
+
+    generate = commands.add_parser("send", help="send a synthetic scenario to a server")
+    generate.add_argument("--port", type=int, default=9999)
+
+    load = commands.add_parser("load-test", help="run a server and the traffic generator on loopback")
+
+    for command in (run, generate, load):
+        command.add_argument("--host", default="127.0.0.1")
+    for command in (generate, load):
+        command.add_argument("--plots", type=int, default=100000)
+        command.add_argument("--rate", type=float, default=None, help="plots per second; default as fast as possible")
+        command.add_argument("--plots-per-datagram", type=int, default=64)
+        command.add_argument("--seed", type=int, default=0)
+    for command in (run, load):
+        command.add_argument("--window", type=float, default=1.0)
+        command.add_argument("--max-lateness", type=float, default=0.0)
+        command.add_argument("--queue-size", type=int, default=4096)
+        command.add_argument("--policy", choices=POLICIES[1:], default="oldest")
+        command.add_argument("--scan-queue-size", type=int, default=8)
+        command.add_argument("--scan-policy", choices=POLICIES, default="block")
+        command.add_argument("--doppler-threshold", type=float, default=2.0)
+        command.add_argument("--range-threshold", type=float, default=10.0)
+        command.add_argument("--firm-threshold", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    runners = {"serve": serve, "send": send, "load-test": load_test}
+    try:
+        asyncio.run(runners[args.command](args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
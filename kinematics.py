@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def radial_velocity(xyz, doppler):
+    # Velocity along the line of sight implied by a Doppler measurement; the only velocity
+    # a single plot can give a new track
+    distance = np.linalg.norm(xyz, axis=1, keepdims=True)
+    return xyz / np.where(distance > 0, distance, 1.0) * np.reshape(doppler, (-1, 1))
+
+
+def clip_speed(velocity, max_speed):
+    # Scales down velocities faster than max_speed; None leaves them as they are
+    if max_speed is None or len(velocity) == 0:
+        return velocity
+    speed = np.linalg.norm(velocity, axis=1, keepdims=True)
+    return velocity * np.minimum(1.0, max_speed / np.maximum(speed, np.finfo(float).tiny))
+
+
+def plot_times(scan, scan_count):
+    # Plots carry their time in the fifth column; without it all plots of a scan take the scan
+    # number, counted from 1, so scans are one time unit apart
+    return scan[:, 4].copy() if scan.shape[1] > 4 else np.full(len(scan), float(scan_count))
+
+
+def alpha_beta_update(store, slots, meas_xyz, meas_time, alpha, beta, max_speed=None):
+    # Vectorized alpha-beta correction of the heads of slots, each predicted to the time of its
+    # own plot; returns the new positions, velocities and position covariances. The new head
+    # weighs the prediction by 1 - alpha and the plot, whose covariance is
+    # store.initial_covariance, by alpha. Two plots close in time make the velocity gain
+    # large, so velocities are limited to max_speed.
+    predicted = store.head_at(slots, meas_time)
+    residual = meas_xyz - predicted
+    elapsed = meas_time - store.update_time[slots]
+    gain = np.divide(beta, elapsed, out=np.zeros(len(slots)), where=elapsed > 0)
+    covariance = (1 - alpha) ** 2 * store.covariance[slots] + alpha ** 2 * store.initial_covariance
+    velocity = clip_speed(store.velocity[slots] + gain[:, None] * residual, max_speed)
+    return predicted + alpha * residual, velocity, covariance
@@ -0,0 +1,166 @@
+import csv
+import os
+import time
+
+import numpy as np
+
+# Stages of one scan, in the order Tracker.process_scan runs them
+STAGES = ("convert", "predict", "lookup", "gate", "assign", "maintain", "emit")
+# Per-scan counts: candidates are pairs looked up in the indexes and checked against the
+# gates, gated_pairs the ones that passed; the rest count event codes and miss increments
+COUNTS = ("plots", "candidates", "gated_pairs", "assigned", "initiated", "firmed", "deleted", "misses")
+SCAN_COLUMNS = ("scan",) + COUNTS + ("tracks", "firm_tracks") + tuple(f"{stage}_seconds" for stage in STAGES)
+
+# Histogram upper bounds; the last bucket of each histogram is +Inf
+SECONDS_BUCKETS = np.array([1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 0.1, 0.3, 1.0])
+CANDIDATE_BUCKETS = np.array([0, 1, 2, 4, 8, 16, 32, 64, 128, 256])
+
+DESCRIPTIONS = {
+    "plots": "Plots processed.",
+    "candidates": "Measurement-track pairs checked against the gates.",
+    "gated_pairs": "Measurement-track pairs that passed the gates.",
+    "assigned": "Plots assigned to an existing track.",
+    "initiated": "Tracks initiated.",
+    "firmed": "Tracks that became firm.",
+    "deleted": "Tracks deleted for too many misses.",
+    "misses": "Miss increments applied to tentative tracks.",
+}
+
+
+class NullMetrics:
+    # Instrumentation switched off; callers check enabled and skip every measurement
+    enabled = False
+
+    def start_scan(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def count(self, name, value):
+        pass
+
+    def candidates(self, per_measurement):
+        pass
+
+    def end_scan(self, tracks, firm_tracks):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Metrics:
+    # Counters and fixed-bucket histograms for the tracker hot path. Stage times are laps of
+    # one perf_counter clock; per-scan rows go to scan_csv (a path or an open file) if given.
+    enabled = True
+
+    def __init__(self, scan_csv=None, prefix="tracker"):
+        self.prefix = prefix
+        self.totals = dict.fromkeys(COUNTS, 0)
+        self.scans = 0
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stage_histograms = {stage: np.zeros(len(SECONDS_BUCKETS) + 1, dtype=np.int64) for stage in STAGES}
+        self.candidate_histogram = np.zeros(len(CANDIDATE_BUCKETS) + 1, dtype=np.int64)
+        self.candidate_sum = 0
+        self.tracks = 0
+        self.firm_tracks = 0
+        self.scan = None
+        self.last = None
+
+        self.owns_file = isinstance(scan_csv, str)
+        self.file = open(scan_csv, "w", newline="") if self.owns_file else scan_csv
+        self.writer = None
+        if self.file is not None:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(SCAN_COLUMNS)
+
+    def start_scan(self):
+        self.scan = dict.fromkeys(COUNTS + STAGES, 0)
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.scan[stage] += now - self.last
+        self.last = now
+
+    def count(self, name, value):
+        self.scan[name] += int(value)
+
+    def candidates(self, per_measurement):
+        # Number of candidate tracks looked up for each measurement of the scan
+        per_measurement = np.asarray(per_measurement)
+        self.candidate_histogram += np.bincount(
+            np.searchsorted(CANDIDATE_BUCKETS, per_measurement), minlength=len(self.candidate_histogram)
+        )
+        self.candidate_sum += int(per_measurement.sum())
+
+    def end_scan(self, tracks, firm_tracks):
+        scan = self.scan
+        for name in COUNTS:
+            self.totals[name] += scan[name]
+        for stage in STAGES:
+            self.stage_seconds[stage] += scan[stage]
+            self.stage_histograms[stage][np.searchsorted(SECONDS_BUCKETS, scan[stage])] += 1
+        self.tracks = tracks
+        self.firm_tracks = firm_tracks
+        if self.writer is not None:
+            self.writer.writerow(
+                [self.scans] + [scan[name] for name in COUNTS] + [tracks, firm_tracks]
+                + [f"{scan[stage]:.9f}" for stage in STAGES]
+            )
+        self.scans += 1
+
+    def prometheus(self):
+        # Text exposition format, as read by the node exporter's textfile collector
+        prefix = self.prefix
+        lines = [f"# HELP {prefix}_scans_total Scans processed.", f"# TYPE {prefix}_scans_total counter",
+                 f"{prefix}_scans_total {self.scans}"]
+        for name in COUNTS:
+            lines += [f"# HELP {prefix}_{name}_total {DESCRIPTIONS[name]}", f"# TYPE {prefix}_{name}_total counter",
+                      f"{prefix}_{name}_total {self.totals[name]}"]
+        lines += [f"# HELP {prefix}_tracks Live tracks after the last scan.", f"# TYPE {prefix}_tracks gauge",
+                  f"{prefix}_tracks {self.tracks}",
+                  f"# HELP {prefix}_firm_tracks Firm tracks after the last scan.", f"# TYPE {prefix}_firm_tracks gauge",
+                  f"{prefix}_firm_tracks {self.firm_tracks}"]
+
+        name = f"{prefix}_stage_seconds"
+        lines += [f"# HELP {name} Time spent in each stage of a scan.", f"# TYPE {name} histogram"]
+        for stage in STAGES:
+            lines += _histogram_lines(name, f'stage="{stage}",', SECONDS_BUCKETS, self.stage_histograms[stage],
+                                      self.stage_seconds[stage])
+        name = f"{prefix}_candidates_per_plot"
+        lines += [f"# HELP {name} Candidate tracks looked up per plot.", f"# TYPE {name} histogram"]
+        lines += _histogram_lines(name, "", CANDIDATE_BUCKETS, self.candidate_histogram, self.candidate_sum)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Written beside the target and renamed, so the collector never reads a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.prometheus())
+        os.replace(temporary, path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.flush()
+            if self.owns_file:
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _histogram_lines(name, labels, bounds, counts, total):
+    cumulative = np.cumsum(counts).tolist()
+    lines = [f'{name}_bucket{{{labels}le="{bound:g}"}} {count}' for bound, count in zip(bounds.tolist(), cumulative)]
+    lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {cumulative[-1]}')
+    labels = f"{{{labels.rstrip(',')}}}" if labels else ""
+    lines += [f"{name}_sum{labels} {total:g}", f"{name}_count{labels} {cumulative[-1]}"]
+    return lines
@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from events import ASSIGNED, INITIATED
+from gating import DopplerGate, RangeGate
+from scenario import scenario_for_size
+from tracker import Tracker
+
+
+# Sectors overlap by this many gate reaches on either side
+MARGIN_REACHES = 2
+
+
+def sector_margin(plots, distance):
+    # Widest azimuth (degrees) spanned by distance at the horizontally closest plot; points
+    # within distance of a core plot are then always inside the sector plus this margin
+    if len(plots) == 0:
+        return 0.0
+    closest = float(np.min(plots[:, 2] * np.cos(np.radians(plots[:, 1]))))
+    if closest <= distance:
+        return 180.0
+    return float(np.degrees(np.arcsin(distance / closest)))
+
+
+def in_sector(az, low, width):
+    return np.mod(az - low, 360.0) < width
+
+
+def _track_sector(task):
+    # Worker: attach to the shared plots, run a Tracker over this sector plus its margins, and
+    # return the plot rows it saw with the local track id each one went to. Every scan is
+    # processed, so the tracks of a sector count their misses on the same scans as serially.
+    name, shape, low, width, doppler_threshold, range_threshold, options = task
+    shm = SharedMemory(name=name)
+    try:
+        data = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        scans = np.unique(data[:, -1])
+        rows = np.flatnonzero(in_sector(data[:, 0], low, width))
+        plots = data[rows]
+    finally:
+        shm.close()
+
+    tracker = Tracker(doppler_threshold, range_threshold, **options)
+    labels = np.full(len(rows), -1, dtype=np.int64)
+    boundaries = np.searchsorted(plots[:, -1], scans[1:])
+    for scan in np.split(plots[:, :-1], boundaries):
+        events = tracker.process_scan(scan)
+        events = events[(events["code"] == ASSIGNED) | (events["code"] == INITIATED)]
+        labels[events["measurement"]] = events["track_id"]
+    return rows, labels
+
+
+def merge_sectors(n_plots, owner, results):
+    # A plot's links to the previous and next plot of its track are taken from the sector
+    # owning it. Two plots are linked only when both owners agree, so sectors that tracked an
+    # overlap differently split the track there rather than joining unrelated tracks.
+    before = np.full(n_plots, -1, dtype=np.int64)
+    after = np.full(n_plots, -1, dtype=np.int64)
+    for sector, (rows, labels) in enumerate(results):
+        order = np.lexsort((rows, labels))
+        rows, labels = rows[order], labels[order]
+        same = labels[1:] == labels[:-1]
+        first, second = rows[:-1][same], rows[1:][same]
+        owned = owner[second] == sector
+        before[second[owned]] = first[owned]
+        owned = owner[first] == sector
+        after[first[owned]] = second[owned]
+
+    rows = np.arange(n_plots)
+    linked = before >= 0
+    linked[linked] = after[before[linked]] == rows[linked]
+    # Follow the links back to the first plot of each track; ids then follow the order in
+    # which tracks first appear, as serial track ids do
+    start = np.where(linked, before, rows)
+    while True:
+        jumped = start[start]
+        if np.array_equal(jumped, start):
+            break
+        start = jumped
+    return np.unique(start, return_inverse=True)[1]
+
+
+def track_partitioned(plots, scan_index, doppler_threshold, range_threshold, n_sectors=None, n_workers=None,
+                      **tracker_options):
+    # Returns the global track id of every plot; scan_index must be non-decreasing. Association
+    # only happens within a sector and its margins, so the gating must bound how far a plot
+    # can be from the track it joins: a gate passing on Doppler alone, such as the default OR
+    # gate, is rejected, as are predicted heads and miss counts taken over the whole scan.
+    gating = tracker_options.get("gating")
+    reach = None if gating is None else gating.reach()
+    if reach is None:
+        raise ValueError("partitioned tracking needs a gating whose every passing pair is within a range gate")
+    if tracker_options.get("alpha_beta") is not None:
+        raise ValueError("partitioned tracking does not support alpha_beta")
+    if tracker_options.get("miss_rule", "scan") != "scan":
+        raise ValueError("partitioned tracking only supports miss_rule='scan'")
+
+    plots = np.asarray(plots, dtype=float)
+    n_sectors = n_sectors or os.cpu_count() or 1
+    width = 360.0 / n_sectors
+    margin = sector_margin(plots, MARGIN_REACHES * reach)
+    owner = np.minimum((np.mod(plots[:, 0], 360.0) // width).astype(np.int64), n_sectors - 1)
+
+    data = np.column_stack((plots, scan_index))
+    shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        shared = np.ndarray(data.shape, dtype=float, buffer=shm.buf)
+        shared[:] = data
+        tasks = [
+            (shm.name, data.shape, sector * width - margin, min(width + 2 * margin, 360.0),
+             doppler_threshold, range_threshold, tracker_options)
+            for sector in range(n_sectors)
+        ]
+        with ProcessPoolExecutor(max_workers=n_workers or n_sectors) as pool:
+            results = list(pool.map(_track_sector, tasks))
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return merge_sectors(len(plots), owner, results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sector-partitioned tracking on a synthetic scenario.")
+    parser.add_argument("--plots", type=int, default=100000)
+    parser.add_argument("--sectors", type=int, default=os.cpu_count())
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scenario = scenario_for_size(args.plots, seed=args.seed)
+    start = time.perf_counter()
+    labels = track_partitioned(
+        scenario.plots, scenario.scan, 2.0, 10.0, n_sectors=args.sectors, n_workers=args.workers,
+        firm_threshold=3, max_misses=3, gating=DopplerGate(2.0) & RangeGate(10.0),
+    )
+    seconds = time.perf_counter() - start
+    print(f"{len(scenario.plots)} plots in {seconds:.2f} s ({len(scenario.plots) / seconds:.0f} plots/s), "
+          f"{labels.max() + 1} tracks over {args.sectors} sectors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import numpy as np
+
+from gating import test_f_gate
+from tracker import Tracker
+
+# Trackers reproducing each script's initialize_tracks when fed one plot per scan, the plots
+# being raw (azimuth, elevation, range, Doppler, time) rows. Events go to sink.
+
+
+def test_tr_in1(doppler_threshold, range_threshold, sink=None):
+    # OR gate, tracks never firm and are never deleted
+    return Tracker(doppler_threshold, range_threshold, sink=sink)
+
+
+def tr_in2(doppler_threshold, range_threshold, firm_threshold, sink=None):
+    # OR gate, firm after firm_threshold plots, never deleted
+    return Tracker(doppler_threshold, range_threshold, firm_threshold=firm_threshold, sink=sink)
+
+
+def tr_inf(doppler_threshold, range_threshold, firm_threshold, sink=None):
+    # OR gate; every new track is a miss for the tentative ones, deleted beyond firm_threshold
+    return Tracker(
+        doppler_threshold, range_threshold, firm_threshold=firm_threshold, max_misses=firm_threshold,
+        miss_rule="unassigned", sink=sink,
+    )
+
+
+def test_f(doppler_threshold, range_threshold, chi2_threshold, cov_matrix=None, history_length=16, sink=None):
+    # Doppler and (range or Mahalanobis) against every plot of the track. test_f keeps all of
+    # a track's plots, so this matches it only while no track outgrows history_length.
+    cov_matrix = np.eye(3) if cov_matrix is None else cov_matrix
+    return Tracker(
+        doppler_threshold, range_threshold, history_length=history_length, sink=sink,
+        gating=test_f_gate(doppler_threshold, range_threshold, chi2_threshold), covariance=cov_matrix,
+    )
+
+
+PRESETS = {"test_tr_in1": test_tr_in1, "tr_in2": tr_in2, "tr_inf": tr_inf, "test_f": test_f}
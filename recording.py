@@ -0,0 +1,223 @@
+import argparse
+import csv
+import importlib
+import time
+
+import numpy as np
+
+from metrics import Metrics
+from tracker import Tracker
+
+# File layout: 64-byte header | plots as little-endian float64 rows of COLUMNS | scan index of
+# (scans + 1) uint64 row offsets. Plot rows map straight onto (N, 6) float arrays, so
+# scans are zero-copy slices of the memory map.
+MAGIC = b"TRKPLOTS"
+VERSION = 1
+HEADER_SIZE = 64
+COLUMNS = ("azimuth", "elevation", "range", "doppler", "time", "sensor")
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"), ("version", "<u4"), ("columns", "<u4"),
+    ("plots", "<u8"), ("scans", "<u8"), ("index_offset", "<u8"),
+])
+PLOT_DTYPE = np.dtype([(name, "<f8") for name in COLUMNS])
+
+
+def plot_rows(plots):
+    # (N, 4..6) plots as little-endian rows of COLUMNS; missing time and sensor are filled with 0
+    plots = np.asarray(plots, dtype=float)
+    rows = np.zeros((len(plots), len(COLUMNS)), dtype="<f8")
+    rows[:, :plots.shape[1]] = plots[:, :len(COLUMNS)]
+    return rows
+
+
+class RecordingWriter:
+    # Streams plots to disk chunk by chunk; the scan index is written on close
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(bytes(HEADER_SIZE))
+        self.plots = 0
+        self.offsets = []
+        self.last_scan = None
+
+    def _append(self, plots):
+        rows = plot_rows(plots)
+        self.file.write(rows.tobytes())
+        self.plots += len(rows)
+
+    def write(self, plots, scan_ids):
+        # plots: (N, 4..6) rows of COLUMNS, see plot_rows; scan_ids: scan label of each row,
+        # a new scan starts wherever the label changes
+        if len(plots) == 0:
+            return
+        scan_ids = np.asarray(scan_ids)
+        starts = np.flatnonzero(scan_ids[1:] != scan_ids[:-1]) + 1
+        if self.last_scan is None or scan_ids[0] != self.last_scan:
+            starts = np.concatenate(([0], starts))
+        self.offsets.extend((self.plots + starts).tolist())
+        self.last_scan = scan_ids[-1]
+        self._append(plots)
+
+    def write_scan(self, plots):
+        # The plots form one scan of their own
+        if len(plots) == 0:
+            return
+        self.offsets.append(self.plots)
+        self.last_scan = None
+        self._append(plots)
+
+    def close(self):
+        index_offset = HEADER_SIZE + self.plots * PLOT_DTYPE.itemsize
+        self.file.write(np.array(self.offsets + [self.plots], dtype="<u8").tobytes())
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (MAGIC, VERSION, len(COLUMNS), self.plots, len(self.offsets), index_offset)
+        self.file.seek(0)
+        self.file.write(header.tobytes())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Recording:
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a plot recording")
+        if header["version"][0] != VERSION:
+            raise ValueError(f"{path} has unsupported recording version {header['version'][0]}")
+        self.path = path
+        self.n_plots = int(header["plots"][0])
+        self.n_scans = int(header["scans"][0])
+        self.plots = np.memmap(path, dtype="<f8", mode="r", offset=HEADER_SIZE, shape=(self.n_plots, len(COLUMNS)))
+        self.offsets = np.memmap(
+            path, dtype="<u8", mode="r", offset=int(header["index_offset"][0]), shape=(self.n_scans + 1,)
+        )
+
+    def __len__(self):
+        return self.n_scans
+
+    def scan(self, index):
+        return self.plots[self.offsets[index]:self.offsets[index + 1]]
+
+    def scans(self):
+        for index in range(self.n_scans):
+            yield self.scan(index)
+
+    def records(self):
+        # Named-field view of the same memory
+        return self.plots.view(PLOT_DTYPE).reshape(-1)
+
+
+def write_recording(path, plots, scan_ids):
+    with RecordingWriter(path) as writer:
+        writer.write(plots, scan_ids)
+
+
+def window_ids(times, window):
+    return np.floor(np.asarray(times, dtype=float) / window).astype(np.int64)
+
+
+def from_tuples(measurements, path, window=1.0):
+    # The scripts' (azimuth, elevation, range, Doppler[, time]) tuples; without a time field
+    # the plot's position in the list is used as its time
+    plots = np.array([tuple(m) + (() if len(m) > 4 else (float(index),)) for index, m in enumerate(measurements)],
+                     dtype=float)
+    write_recording(path, plots, window_ids(plots[:, 4], window))
+
+
+def from_csv(csv_path, path, window=1.0, chunk_size=1 << 16):
+    # CSV with a header row naming at least azimuth, elevation, range, doppler and time;
+    # sensor and scan columns are optional, without scan plots are grouped by time window
+    with open(csv_path, newline="") as f, RecordingWriter(path) as writer:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader)]
+        missing = [name for name in COLUMNS[:5] if name not in header]
+        if missing:
+            raise ValueError(f"{csv_path} is missing columns {missing}")
+        columns = [header.index(name) for name in COLUMNS if name in header]
+        scan_column = header.index("scan") if "scan" in header else None
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                _write_csv_chunk(writer, rows, columns, scan_column, window)
+                rows = []
+        _write_csv_chunk(writer, rows, columns, scan_column, window)
+
+
+def _write_csv_chunk(writer, rows, columns, scan_column, window):
+    if not rows:
+        return
+    values = np.array([[float(row[column]) for column in columns] for row in rows])
+    if scan_column is None:
+        scan_ids = window_ids(values[:, 4], window)
+    else:
+        scan_ids = np.array([int(row[scan_column]) for row in rows])
+    writer.write(values, scan_ids)
+
+
+def replay(recording, tracker, rate=None):
+    # Feeds every scan to the tracker. rate=None runs at full speed; otherwise scans are
+    # released at `rate` times the recorded pace, using each scan's first plot time
+    start_wall = time.perf_counter()
+    start_time = None
+    for scan in recording.scans():
+        if rate is not None and len(scan):
+            if start_time is None:
+                start_time = scan[0, 4]
+            delay = (scan[0, 4] - start_time) / rate - (time.perf_counter() - start_wall)
+            if delay > 0:
+                time.sleep(delay)
+        tracker.process_scan(scan)
+    return time.perf_counter() - start_wall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and replay plot recordings.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_csv = commands.add_parser("convert-csv", help="convert a CSV file of plots")
+    convert_csv.add_argument("csv")
+    convert_csv.add_argument("output")
+    convert_csv.add_argument("--window", type=float, default=1.0)
+
+    convert_module = commands.add_parser("convert-module", help="convert a module's sample_measurements list")
+    convert_module.add_argument("module")
+    convert_module.add_argument("output")
+    convert_module.add_argument("--window", type=float, default=1.0)
+
+    play = commands.add_parser("replay", help="replay a recording through the tracker")
+    play.add_argument("recording")
+    play.add_argument("--rate", type=float, default=None, help="pace relative to recorded time; default full speed")
+    play.add_argument("--doppler-threshold", type=float, default=2.0)
+    play.add_argument("--range-threshold", type=float, default=10.0)
+    play.add_argument("--firm-threshold", type=int, default=3)
+    play.add_argument("--metrics-csv", default=None, help="write per-scan metrics to this CSV file")
+    play.add_argument("--prometheus", default=None, help="write final metrics to this Prometheus textfile")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert-csv":
+        from_csv(args.csv, args.output, window=args.window)
+    elif args.command == "convert-module":
+        from_tuples(importlib.import_module(args.module).sample_measurements, args.output, window=args.window)
+    else:
+        recording = Recording(args.recording)
+        metrics = Metrics(scan_csv=args.metrics_csv) if args.metrics_csv or args.prometheus else None
+        tracker = Tracker(
+            args.doppler_threshold, args.range_threshold,
+            firm_threshold=args.firm_threshold, max_misses=args.firm_threshold, metrics=metrics,
+        )
+        seconds = replay(recording, tracker, rate=args.rate)
+        if metrics is not None:
+            metrics.close()
+            if args.prometheus:
+                metrics.write_prometheus(args.prometheus)
+        print(f"{recording.n_plots} plots in {len(recording)} scans, {seconds:.2f} s "
+              f"({recording.n_plots / max(seconds, 1e-9):.0f} plots/s), {tracker.store.next_id} tracks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import math
+from collections import namedtuple
+
+import numpy as np
+
+
+# A released window is split into batches of at most max_batch plots; all batches of a window
+# carry its end time, and the last one has last=True, so consumers can rebuild the whole scan
+Batch = namedtuple("Batch", "window plots last")
+# After this many empty windows in a row the rest of a gap is skipped in one step, so a jump in
+# the plot times costs a bounded number of scans
+MAX_GAP_WINDOWS = 64
+
+
+class ScanAssembler:
+    # Groups individually timestamped plots into scans of `window` time units. Plots may arrive
+    # up to max_lateness late; a window is released once a plot newer than its end plus
+    # max_lateness has been seen. Plots older than a released window are dropped and counted.
+    # Windows without plots are released as empty scans.
+    def __init__(self, window, max_lateness=0.0, max_batch=4096, time_column=4):
+        if window <= 0 or max_lateness < 0 or max_batch < 1:
+            raise ValueError("window and max_batch must be positive and max_lateness non-negative")
+        self.window = window
+        self.max_lateness = max_lateness
+        self.max_batch = max_batch
+        self.time_column = time_column
+        self.heap = []
+        self.sequence = itertools.count()
+        self.newest = -math.inf
+        self.window_end = None
+        self.columns = 0
+        self.empty_windows = 0
+        self.released_until = -math.inf
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _window_end(self, time):
+        return (math.floor(time / self.window) + 1) * self.window
+
+    def push(self, plot):
+        # Returns the batches this plot completes, usually none
+        plot = tuple(plot)
+        time = plot[self.time_column]
+        if time < self.released_until:
+            self.dropped += 1
+            return []
+        heapq.heappush(self.heap, (time, next(self.sequence), plot))
+        self.columns = len(plot)
+        if self.window_end is None:
+            self.window_end = self._window_end(time)
+        self.newest = max(self.newest, time)
+        return self._release(self.newest - self.max_lateness)
+
+    def extend(self, plots):
+        batches = []
+        for plot in np.asarray(plots, dtype=float).tolist():
+            batches.extend(self.push(plot))
+        return batches
+
+    def flush(self):
+        return self._release(math.inf)
+
+    def _release(self, watermark):
+        batches = []
+        while self.heap and self.window_end <= watermark:
+            plots = []
+            while self.heap and self.heap[0][0] < self.window_end:
+                plots.append(heapq.heappop(self.heap)[2])
+            self.released_until = self.window_end
+            self.empty_windows = 0 if plots else self.empty_windows + 1
+            if plots:
+                scan = np.array(plots, dtype=float)
+                starts = range(0, len(scan), self.max_batch)
+                batches.extend(
+                    Batch(self.window_end, scan[start:start + self.max_batch], start == starts[-1]) for start in starts
+                )
+            else:
+                # A window without plots is still a scan, in which every track misses
+                batches.append(Batch(self.window_end, np.empty((0, self.columns)), True))
+            self.window_end += self.window
+            if self.heap and self.empty_windows >= MAX_GAP_WINDOWS:
+                self.window_end = max(self.window_end, self._window_end(self.heap[0][0]))
+        return batches
+
+
+def assemble(plots, window, max_lateness=0.0, max_batch=4096, time_column=4):
+    # Generator of the Batches of contiguous scans from an iterable of plots
+    assembler = ScanAssembler(window, max_lateness=max_lateness, max_batch=max_batch, time_column=time_column)
+    for plot in plots:
+        yield from assembler.push(plot)
+    yield from assembler.flush()
@@ -0,0 +1,59 @@
+import numpy as np
+
+from assignment import gnn_assign
+from metrics import NULL_METRICS
+
+
+def sph2cart(az, el, r):
+    az = np.radians(az)
+    el = np.radians(el)
+    x = r * np.cos(el) * np.cos(az)
+    y = r * np.cos(el) * np.sin(az)
+    z = r * np.sin(el)
+    return x, y, z
+
+
+def to_cartesian(measurements):
+    # (M, 4+) array of (azimuth, elevation, range, doppler, ...) -> (M, 3) positions, (M,) Doppler
+    measurements = np.asarray(measurements, dtype=float)
+    if measurements.ndim != 2 or measurements.shape[1] < 4:
+        raise ValueError(f"expected an (M, 4) measurement array, got shape {measurements.shape}")
+    x, y, z = sph2cart(measurements[:, 0], measurements[:, 1], measurements[:, 2])
+    return np.column_stack((x, y, z)), measurements[:, 3].copy()
+
+
+def first_fit(rows, cols, n_measurements, n_tracks):
+    # Gated (measurement, slot) pairs in preference order; each measurement takes the first
+    # gated track not already used in this scan
+    assignments = np.full(n_measurements, -1, dtype=np.intp)
+    free = np.ones(n_tracks, dtype=bool)
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        if assignments[row] < 0 and free[col]:
+            assignments[row] = col
+            free[col] = False
+    return assignments
+
+
+def associate(store, meas_xyz, meas_doppler, gate, doppler_threshold, range_threshold, method="first_fit",
+              metrics=NULL_METRICS, meas_time=None):
+    # Association of one scan under gate, a gating.Gate; also reports the DOPPLER_GATE and
+    # RANGE_GATE bits the chosen pair passed. method="gnn" solves the scan globally, costing
+    # each gated pair by its range and Doppler differences relative to their thresholds. With
+    # meas_time heads are predicted to the time of each plot.
+    rows, cols, bits = gate.pairs(store, meas_xyz, meas_doppler, metrics=metrics, meas_time=meas_time)
+    if method == "gnn":
+        heads = store.xyz[cols] if meas_time is None else store.head_at(cols, meas_time[rows])
+        delta = meas_xyz[rows] - heads
+        costs = (
+            np.sqrt(np.einsum("ij,ij->i", delta, delta)) / range_threshold
+            + np.abs(meas_doppler[rows] - store.doppler[cols]) / doppler_threshold
+        )
+        assignments = gnn_assign(rows, cols, costs, len(meas_xyz), len(store))
+    else:
+        assignments = first_fit(rows, cols, len(meas_xyz), len(store))
+    chosen = assignments[rows] == cols
+    gates = np.zeros(len(meas_xyz), dtype=np.uint8)
+    gates[rows[chosen]] = bits[chosen]
+    if metrics.enabled:
+        metrics.lap("assign")
+    return assignments, gates
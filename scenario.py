@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+import numpy as np
+
+# plots: (N, 5) of (azimuth, elevation, range, Doppler, time), sorted by time
+# truth: target index of each plot, -1 for clutter; scan: scan index of each plot
+Scenario = namedtuple("Scenario", ["plots", "truth", "scan"])
+
+
+def cart2sph(x, y, z):
+    r = np.sqrt(x * x + y * y + z * z)
+    az = np.degrees(np.arctan2(y, x))
+    el = np.degrees(np.arcsin(z / r))
+    return az, el, r
+
+
+def generate_scenario(n_targets, n_scans, clutter_rate, scan_period=1.0, min_range=100.0, max_range=1000.0,
+                      max_speed=50.0, detection_probability=0.9, noise=(0.05, 0.05, 0.5, 0.5), seed=0):
+    # n_targets constant-velocity targets plus Poisson(clutter_rate) clutter plots per scan,
+    # all inside the elevation band [0, 30] degrees and the range band [min_range, max_range]
+    rng = np.random.default_rng(seed)
+    az0 = rng.uniform(-180, 180, n_targets)
+    el0 = rng.uniform(0, 30, n_targets)
+    r0 = rng.uniform(min_range, max_range, n_targets)
+    az0r, el0r = np.radians(az0), np.radians(el0)
+    position = np.column_stack((
+        r0 * np.cos(el0r) * np.cos(az0r), r0 * np.cos(el0r) * np.sin(az0r), r0 * np.sin(el0r),
+    ))
+    heading = rng.normal(size=(n_targets, 3))
+    heading /= np.linalg.norm(heading, axis=1, keepdims=True)
+    velocity = heading * rng.uniform(0, max_speed, (n_targets, 1))
+
+    plots, truth, scan_index = [], [], []
+    for scan in range(n_scans):
+        # Plots of one scan arrive spread over the scan period, each at its own time
+        start = scan * scan_period
+        detected = np.flatnonzero(rng.random(n_targets) < detection_probability)
+        target_times = start + rng.uniform(0, scan_period, len(detected))
+        xyz = position[detected] + velocity[detected] * target_times[:, None]
+        az, el, r = cart2sph(xyz[:, 0], xyz[:, 1], xyz[:, 2])
+        doppler = np.einsum("ij,ij->i", velocity[detected], xyz) / r
+        target_plots = np.column_stack((az, el, r, doppler))
+        target_plots += rng.normal(size=target_plots.shape) * noise
+
+        n_clutter = rng.poisson(clutter_rate)
+        clutter_plots = np.column_stack((
+            rng.uniform(-180, 180, n_clutter), rng.uniform(0, 30, n_clutter),
+            rng.uniform(min_range, max_range, n_clutter), rng.uniform(-max_speed, max_speed, n_clutter),
+        ))
+        clutter_times = start + rng.uniform(0, scan_period, n_clutter)
+
+        scan_plots = np.column_stack((np.vstack((target_plots, clutter_plots)), np.concatenate((target_times, clutter_times))))
+        scan_truth = np.concatenate((detected, np.full(n_clutter, -1)))
+        order = np.argsort(scan_plots[:, 4], kind="stable")
+        plots.append(scan_plots[order])
+        truth.append(scan_truth[order])
+        scan_index.append(np.full(len(scan_plots), scan))
+
+    return Scenario(np.vstack(plots), np.concatenate(truth), np.concatenate(scan_index))
+
+
+def scenario_for_size(n_plots, n_scans=50, clutter_fraction=0.5, detection_probability=0.9, seed=0):
+    # About n_plots plots in total; the range band grows with the plot count so density stays comparable
+    per_scan = max(n_plots / n_scans, 1.0)
+    n_targets = max(int(round(per_scan * (1 - clutter_fraction) / detection_probability)), 1)
+    max_range = 100.0 + 20.0 * per_scan
+    return generate_scenario(
+        n_targets, n_scans, per_scan * clutter_fraction, max_range=max_range,
+        detection_probability=detection_probability, seed=seed,
+    )
+
+
+def split_scans(scenario):
+    boundaries = np.flatnonzero(np.diff(scenario.scan)) + 1
+    return np.split(scenario.plots, boundaries)
@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+
+NEIGHBOUR_OFFSETS = list(itertools.product((-1, 0, 1), repeat=3))
+
+
+class GridIndex:
+    # Uniform grid hash of track heads; with cell_size >= range_threshold every track inside
+    # the range gate of a point lies in the 3x3x3 block of cells around that point
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.track_cells = {}
+
+    def __len__(self):
+        return len(self.track_cells)
+
+    def _keys(self, xyz):
+        cells = np.floor(np.reshape(xyz, (-1, 3)) / self.cell_size).astype(np.int64)
+        return list(zip(*cells.T.tolist()))
+
+    def _discard(self, track_id, key):
+        cell = self.cells[key]
+        cell.discard(track_id)
+        if not cell:
+            del self.cells[key]
+
+    def insert(self, track_ids, xyz):
+        # Also used to move existing tracks; only tracks that change cell touch the hash
+        if not self.track_cells:
+            # Filling an empty grid needs no checks for tracks already present
+            track_ids, keys = np.ravel(track_ids).tolist(), self._keys(xyz)
+            self.track_cells = dict(zip(track_ids, keys))
+            cells = self.cells
+            for track_id, key in zip(track_ids, keys):
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = {track_id}
+                else:
+                    cell.add(track_id)
+            return
+        for track_id, key in zip(np.ravel(track_ids).tolist(), self._keys(xyz)):
+            old_key = self.track_cells.get(track_id)
+            if old_key == key:
+                continue
+            if old_key is not None:
+                self._discard(track_id, old_key)
+            self.track_cells[track_id] = key
+            self.cells.setdefault(key, set()).add(track_id)
+
+    update = insert
+
+    def remove(self, track_ids):
+        for track_id in np.ravel(track_ids).tolist():
+            key = self.track_cells.pop(track_id, None)
+            if key is not None:
+                self._discard(track_id, key)
+
+    def query(self, xyz):
+        # Candidate track ids for each point, one array per point
+        candidates = []
+        for cx, cy, cz in self._keys(xyz):
+            found = []
+            for dx, dy, dz in NEIGHBOUR_OFFSETS:
+                cell = self.cells.get((cx + dx, cy + dy, cz + dz))
+                if cell:
+                    found.extend(cell)
+            candidates.append(np.array(found, dtype=np.intp))
+        return candidates
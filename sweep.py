@@ -0,0 +1,263 @@
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import test_f
+from events import ASSIGNED, INITIATED, RecordSink
+from recording import COLUMNS, Recording, write_recording
+from scenario import scenario_for_size
+from tracker import Tracker
+
+# Parameters of each engine; "tracker" is the OR-gated Tracker of the tr_* scripts, "chi2" the
+# Doppler AND (range OR chi-squared) gating of test_f
+ENGINE_PARAMS = {
+    "tracker": ("doppler_threshold", "range_threshold", "firm_threshold"),
+    "chi2": ("doppler_threshold", "range_threshold", "firm_threshold", "confidence"),
+}
+# Bump when scores change meaning; edits to the engines change the source hash instead
+CACHE_VERSION = 2
+SCORE_NAMES = ("purity", "false_tracks_per_scan", "false_track_fraction", "time_to_firm", "targets_firm", "firm_tracks")
+
+
+def file_hash(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hash():
+    # Hash of the modules next to this one, which include every engine the sweep runs
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return file_hash(*sorted(glob.glob(os.path.join(directory, "*.py"))))
+
+
+def param_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def parameter_grid(engines, doppler_thresholds, range_thresholds, firm_thresholds, confidences):
+    # One dict per configuration, holding only the parameters its engine uses
+    values = {
+        "doppler_threshold": doppler_thresholds, "range_threshold": range_thresholds,
+        "firm_threshold": firm_thresholds, "confidence": confidences,
+    }
+    grid = []
+    for engine in engines:
+        names = ENGINE_PARAMS[engine]
+        for combination in itertools.product(*(values[name] for name in names)):
+            grid.append({"engine": engine, **dict(zip(names, combination))})
+    return grid
+
+
+def track_labels(plots, offsets, params):
+    # Track id of every plot after running the engine over the recording's scans
+    sink = RecordSink()
+    scans = (plots[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()))
+    if params["engine"] == "tracker":
+        tracker = Tracker(
+            params["doppler_threshold"], params["range_threshold"], firm_threshold=params["firm_threshold"],
+            max_misses=params["firm_threshold"], sink=sink,
+        )
+        for scan in scans:
+            tracker.process_scan(scan)
+    else:
+        test_f.initialize_tracks_batch(
+            scans, np.eye(3), params["confidence"], params["doppler_threshold"], params["range_threshold"], sink=sink
+        )
+    records = sink.records
+    records = records[(records["code"] == ASSIGNED) | (records["code"] == INITIATED)]
+    labels = np.full(len(plots), -1, dtype=np.int64)
+    labels[records["measurement"]] = records["track_id"]
+    return labels
+
+
+def score(labels, truth, times, firm_threshold, n_scans):
+    # A track counts once it holds firm_threshold plots, which is when the count rules firm it.
+    # purity: share of the plots of firm target tracks (majority source not clutter) that come
+    # from each track's majority target; false tracks: firm tracks whose majority source is
+    # clutter; time_to_firm: mean time from a target's first plot to the firming of the first
+    # track following it. The chi2 engine never firms tracks itself, so for it firm_threshold
+    # only applies here.
+    n_tracks = int(labels.max()) + 1 if len(labels) else 0
+    sizes = np.bincount(labels, minlength=n_tracks)
+    firm = sizes >= firm_threshold
+
+    # Majority source of each track, clutter being source 0
+    sources = truth + 1
+    n_sources = int(sources.max()) + 1 if len(sources) else 1
+    pairs, counts = np.unique(labels * n_sources + sources, return_counts=True)
+    pair_tracks, pair_sources = np.divmod(pairs, n_sources)
+    order = np.lexsort((counts, pair_tracks))
+    last = np.flatnonzero(np.r_[pair_tracks[order][1:] != pair_tracks[order][:-1], True])
+    majority_source = np.zeros(n_tracks, dtype=np.int64)
+    majority_count = np.zeros(n_tracks, dtype=np.int64)
+    majority_source[pair_tracks[order][last]] = pair_sources[order][last]
+    majority_count[pair_tracks[order][last]] = counts[order][last]
+
+    # Time of each track's firm_threshold-th plot
+    by_track = np.argsort(labels, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    firm_time = np.full(n_tracks, np.inf)
+    firm_time[firm] = times[by_track[starts[firm] + firm_threshold - 1]]
+
+    true_firm = firm & (majority_source > 0)
+    first_seen = np.full(n_sources, np.inf)
+    np.minimum.at(first_seen, sources, times)
+    confirmed = np.full(n_sources, np.inf)
+    np.minimum.at(confirmed, majority_source[true_firm], firm_time[true_firm])
+    reached = np.isfinite(confirmed[1:])
+    delays = (confirmed[1:] - first_seen[1:])[reached]
+
+    n_firm = int(firm.sum())
+    n_false = int((firm & (majority_source == 0)).sum())
+    firm_plots = int(sizes[true_firm].sum())
+    n_targets = int(np.isfinite(first_seen[1:]).sum())
+    return {
+        "purity": float(majority_count[true_firm].sum() / firm_plots) if firm_plots else None,
+        "false_tracks_per_scan": n_false / n_scans if n_scans else None,
+        "false_track_fraction": n_false / n_firm if n_firm else None,
+        "time_to_firm": float(delays.mean()) if len(delays) else None,
+        "targets_firm": int(reached.sum()) / n_targets if n_targets else None,
+        "firm_tracks": n_firm,
+    }
+
+
+def _evaluate(task):
+    # Worker: attach to the shared recording, run one configuration and score it
+    name, n_plots, offsets, params = task
+    shm = SharedMemory(name=name)
+    try:
+        data = np.ndarray((n_plots, len(COLUMNS) + 1), dtype=float, buffer=shm.buf)
+        plots, truth = data[:, :len(COLUMNS)], data[:, len(COLUMNS)].astype(np.int64)
+        start = time.perf_counter()
+        labels = track_labels(plots, offsets, params)
+        seconds = time.perf_counter() - start
+        scores = score(labels, truth, plots[:, 4], params["firm_threshold"], len(offsets) - 1)
+        del data, plots
+    finally:
+        shm.close()
+    return {**scores, "seconds": seconds}
+
+
+class SweepCache:
+    # Scores by recording hash and parameters, kept in a JSON file. A file written under another
+    # revision (CACHE_VERSION and the source hash by default) is ignored and then overwritten.
+    def __init__(self, path, revision=None):
+        self.path = path
+        self.revision = f"{CACHE_VERSION}:{source_hash()}" if revision is None else revision
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            if stored.get("revision") == self.revision:
+                self.entries = stored["entries"]
+
+    def get(self, recording_hash, params):
+        return self.entries.get(recording_hash, {}).get(param_key(params))
+
+    def put(self, recording_hash, params, scores):
+        self.entries.setdefault(recording_hash, {})[param_key(params)] = scores
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"revision": self.revision, "entries": self.entries}, f)
+        os.replace(temporary, self.path)
+
+
+def sweep(recording_path, truth_path, grid, n_workers=None, cache=None, log=print):
+    # Scores every configuration of grid on the recording; configurations already in the cache
+    # are not run again. Returns (params, scores) pairs in grid order.
+    cache = cache or SweepCache(None)
+    recording_hash = file_hash(recording_path, truth_path)
+    results = [cache.get(recording_hash, params) for params in grid]
+    pending = [index for index, scores in enumerate(results) if scores is None]
+    log(f"{len(grid)} configurations, {len(grid) - len(pending)} cached")
+    if pending:
+        recording = Recording(recording_path)
+        truth = np.load(truth_path)
+        if len(truth) != recording.n_plots:
+            raise ValueError(f"{truth_path} has {len(truth)} labels for {recording.n_plots} plots")
+        offsets = np.array(recording.offsets, dtype=np.int64)
+        shm = SharedMemory(create=True, size=max(recording.n_plots * (len(COLUMNS) + 1) * 8, 1))
+        try:
+            shared = np.ndarray((recording.n_plots, len(COLUMNS) + 1), dtype=float, buffer=shm.buf)
+            shared[:, :len(COLUMNS)] = recording.plots
+            shared[:, len(COLUMNS)] = truth
+            tasks = [(shm.name, recording.n_plots, offsets, grid[index]) for index in pending]
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                for index, scores in zip(pending, pool.map(_evaluate, tasks)):
+                    results[index] = scores
+                    cache.put(recording_hash, grid[index], scores)
+                    log(format_result(grid[index], scores))
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+        cache.save()
+    return list(zip(grid, results))
+
+
+def format_result(params, scores):
+    settings = " ".join(f"{name}={value}" for name, value in params.items())
+    measures = " ".join(
+        f"{name}={'-' if scores[name] is None else format(scores[name], '.3g')}" for name in SCORE_NAMES
+    )
+    return f"{settings}: {measures}"
+
+
+def write_scenario(path, scenario):
+    # A scenario as a recording plus its ground truth beside it; returns the truth path
+    truth_path = os.path.splitext(path)[0] + ".truth.npy"
+    write_recording(path, scenario.plots, scenario.scan)
+    np.save(truth_path, scenario.truth)
+    return truth_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep tracker thresholds over a recording and score them.")
+    parser.add_argument("--recording", default=None, help="recording to replay; default a synthetic scenario")
+    parser.add_argument("--truth", default=None, help="target index of each plot (.npy, -1 for clutter)")
+    parser.add_argument("--plots", type=int, default=20000, help="size of the synthetic scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINE_PARAMS), default=["tracker"])
+    parser.add_argument("--doppler-thresholds", nargs="+", type=float, default=[1.0, 2.0, 4.0])
+    parser.add_argument("--range-thresholds", nargs="+", type=float, default=[5.0, 10.0, 20.0])
+    parser.add_argument("--firm-thresholds", nargs="+", type=int, default=[2, 3, 4])
+    parser.add_argument("--confidences", nargs="+", type=float, default=[0.95])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default="sweep_cache.json")
+    parser.add_argument("--output", default="sweep.json")
+    args = parser.parse_args(argv)
+
+    if args.recording is None:
+        args.recording = f"scenario-{args.plots}-{args.seed}.trk"
+        if not os.path.exists(args.recording):
+            args.truth = write_scenario(args.recording, scenario_for_size(args.plots, seed=args.seed))
+    truth = args.truth or os.path.splitext(args.recording)[0] + ".truth.npy"
+
+    grid = parameter_grid(
+        args.engines, args.doppler_thresholds, args.range_thresholds, args.firm_thresholds, args.confidences
+    )
+    cache = SweepCache(args.cache)
+    results = sweep(args.recording, truth, grid, n_workers=args.workers, cache=cache,
+                    log=lambda line: print(line, flush=True))
+    with open(args.output, "w") as f:
+        json.dump([{**params, **scores} for params, scores in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
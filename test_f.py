@@ -1,5 +1,8 @@
 import numpy as np
-from scipy.stats import chi2
+
+import chi2_gating
+from gating import chi2_gate
+from tracker import Tracker
 
 def sph2cart(az, el, r):
     az = np.radians(az)
@@ -63,6 +66,23 @@ def initialize_tracks(measurements, cov_inv, chi2_threshold, doppler_threshold,
     
     return tracks, track_ids, hit_count, miss_count
 
+def initialize_tracks_batch(scans, cov_matrix, confidence, doppler_threshold, range_threshold, alpha_beta=None,
+                            sink=None, max_misses=3, metrics=None):
+    # Scans of raw (azimuth, elevation, range, Doppler, time) plots through the Tracker with the
+    # test_f rule gated against track heads: Doppler, then range or chi-squared under each
+    # track's covariance. With alpha_beta=(alpha, beta) heads are predicted before gating. Tracks
+    # missing more than max_misses scans in a row are dropped; None keeps them all. The sink
+    # gets one ASSIGNED or INITIATED event per plot, numbered over all scans; metrics, a
+    # metrics.Metrics, collects the Tracker's stage timings.
+    gating = chi2_gate(doppler_threshold, range_threshold, chi2_gating.chi2_threshold(confidence, dim=3))
+    tracker = Tracker(
+        doppler_threshold, range_threshold, max_misses=max_misses, sink=sink, alpha_beta=alpha_beta, gating=gating,
+        covariance=cov_matrix, metrics=metrics,
+    )
+    for scan in scans:
+        tracker.process_scan(scan)
+    return tracker.store
+
 # Sample measurements (azimuth, elevation, range, Doppler velocity, time)
 sample_measurements = [
     (10, 5, 100, 10, 0.1),
@@ -75,27 +95,28 @@ sample_measurements = [
     (55, 25, 515, 22, 0.8),
 ]
 
-# Convert sample measurements to Cartesian coordinates
-converted_measurements = [sph2cart(az, el, r) + (doppler,) for az, el, r, doppler, _ in sample_measurements]
+if __name__ == "__main__":
+    # Convert sample measurements to Cartesian coordinates
+    converted_measurements = [sph2cart(az, el, r) + (doppler,) for az, el, r, doppler, _ in sample_measurements]
 
-# Covariance matrix (assuming identity for simplicity)
-cov_matrix = np.eye(3)
-cov_inv = np.linalg.inv(cov_matrix)
+    # Covariance matrix (assuming identity for simplicity)
+    cov_matrix = np.eye(3)
+    cov_inv = np.linalg.inv(cov_matrix)
 
-# Chi-squared threshold
-state_dim = 3  # 3D state (e.g., x, y, z)
-chi2_threshold = chi2.ppf(0.95, df=state_dim)
+    # Chi-squared threshold
+    state_dim = 3  # 3D state (e.g., x, y, z)
+    chi2_threshold = chi2_gating.chi2_threshold(0.95, dim=state_dim)
 
-# Doppler and range thresholds
-doppler_threshold = 2  # Arbitrary threshold for Doppler gate
-range_threshold = 15  # Arbitrary threshold for range gate
+    # Doppler and range thresholds
+    doppler_threshold = 2  # Arbitrary threshold for Doppler gate
+    range_threshold = 15  # Arbitrary threshold for range gate
 
-# Initialize tracks
-tracks, track_ids, hit_count, miss_count = initialize_tracks(converted_measurements, cov_inv, chi2_threshold, doppler_threshold, range_threshold)
+    # Initialize tracks
+    tracks, track_ids, hit_count, miss_count = initialize_tracks(converted_measurements, cov_inv, chi2_threshold, doppler_threshold, range_threshold)
 
-# Output the tracks and their associated measurements
-for track_id, track in enumerate(tracks):
-    print(f"Track ID {track_id}:")
-    for measurement in track:
-        print(f"  Measurement: {measurement}")
-    print(f"  Hits: {hit_count[track_id]}, Misses: {miss_count[track_id]}")
+    # Output the tracks and their associated measurements
+    for track_id, track in enumerate(tracks):
+        print(f"Track ID {track_id}:")
+        for measurement in track:
+            print(f"  Measurement: {measurement}")
+        print(f"  Hits: {hit_count[track_id]}, Misses: {miss_count[track_id]}")
@@ -1,5 +1,10 @@
+import sys
+
 import numpy as np
 
+from events import ASSIGNED, DEBUG, DOPPLER_GATE, INITIATED, RANGE_GATE, FileSink, NullSink
+from tracker import Tracker
+
 def sph2cart(az, el, r):
     az = np.radians(az)
     el = np.radians(el)
@@ -14,13 +19,21 @@ def doppler_correlation(doppler_1, doppler_2, doppler_threshold):
 def range_gate(distance, range_threshold):
     return distance < range_threshold
 
-def initialize_tracks(measurements, doppler_threshold, range_threshold):
+# This script's wording of each assignment's reason
+MESSAGES = {
+    DOPPLER_GATE | RANGE_GATE: "Both Doppler and Range conditions satisfied.",
+    DOPPLER_GATE: "Doppler condition satisfied, but Range condition not satisfied.",
+    RANGE_GATE: "Range condition satisfied, but Doppler condition not satisfied.",
+}
+
+def initialize_tracks(measurements, doppler_threshold, range_threshold, sink=None):
+    sink = NullSink() if sink is None else sink
     tracks = []
     track_ids = []
     miss_counts = []
     hit_counts = []
 
-    for measurement in measurements:
+    for index, measurement in enumerate(measurements):
         assigned = False
         measurement_cartesian = sph2cart(measurement[0], measurement[1], measurement[2])
         for track_id, track in enumerate(tracks):
@@ -38,21 +51,21 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold):
                 tracks[track_id].append(measurement)
                 hit_counts[track_id] += 1
                 miss_counts[track_id] = 0  # Reset miss count on a hit
-                print(f"Measurement {measurement} assigned to Track ID {track_id}: Both Doppler and Range conditions satisfied.")
+                sink.emit_event(ASSIGNED, track_id, index, DOPPLER_GATE | RANGE_GATE)
                 assigned = True
                 break
             elif doppler_correlated:
                 tracks[track_id].append(measurement)
                 hit_counts[track_id] += 1
                 miss_counts[track_id] = 0
-                print(f"Measurement {measurement} assigned to Track ID {track_id}: Doppler condition satisfied, but Range condition not satisfied.")
+                sink.emit_event(ASSIGNED, track_id, index, DOPPLER_GATE)
                 assigned = True
                 break
             elif range_satisfied:
                 tracks[track_id].append(measurement)
                 hit_counts[track_id] += 1
                 miss_counts[track_id] = 0
-                print(f"Measurement {measurement} assigned to Track ID {track_id}: Range condition satisfied, but Doppler condition not satisfied.")
+                sink.emit_event(ASSIGNED, track_id, index, RANGE_GATE)
                 assigned = True
                 break
 
@@ -62,10 +75,16 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold):
             track_ids.append(track_id)
             miss_counts.append(0)
             hit_counts.append(1)  # Initiate with 1 hit count since it's a new track
-            print(f"Measurement {measurement} initiated a new Track ID {track_id}.")
+            sink.emit_event(INITIATED, track_id, index)
 
     return tracks, track_ids, miss_counts, hit_counts
 
+def initialize_tracks_batch(scans, doppler_threshold, range_threshold, sink=None):
+    tracker = Tracker(doppler_threshold, range_threshold, sink=sink)
+    for scan in scans:
+        tracker.process_scan(scan)
+    return tracker.store
+
 # Sample measurements (azimuth, elevation, range, doppler)
 sample_measurements = [
     (10, 5, 100, 5),
@@ -78,16 +97,19 @@ sample_measurements = [
     (55, 25, 515, 55),
 ]
 
-# Parameters for gating
-doppler_threshold = 2.0  # Doppler gate threshold
-range_threshold = 10.0   # Range gate threshold in Cartesian distance
+if __name__ == "__main__":
+    # Parameters for gating
+    doppler_threshold = 2.0  # Doppler gate threshold
+    range_threshold = 10.0   # Range gate threshold in Cartesian distance
 
-# Initialize tracks
-tracks, track_ids, miss_counts, hit_counts = initialize_tracks(sample_measurements, doppler_threshold, range_threshold)
+    # Initialize tracks, writing the association log to stdout
+    sink = FileSink(sys.stdout, level=DEBUG, measurements=sample_measurements, messages=MESSAGES)
+    tracks, track_ids, miss_counts, hit_counts = initialize_tracks(sample_measurements, doppler_threshold, range_threshold, sink=sink)
+    sink.flush()
 
-# Output the tracks and their associated measurements
-for track_id, track in enumerate(tracks):
-    print(f"Track ID {track_id}:")
-    for measurement in track:
-        print(f"  Measurement: {measurement}")
-    print(f"  Hits: {hit_counts[track_id]}, Misses: {miss_counts[track_id]}")
+    # Output the tracks and their associated measurements
+    for track_id, track in enumerate(tracks):
+        print(f"Track ID {track_id}:")
+        for measurement in track:
+            print(f"  Measurement: {measurement}")
+        print(f"  Hits: {hit_counts[track_id]}, Misses: {miss_counts[track_id]}")
@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from assignment import gnn_assign
+from events import ASSIGNED, INITIATED
+from gating import RangeGate
+from tracker import Tracker
+
+
+def brute_force(pairs, n_measurements):
+    # Best (assigned count, -total cost) over every matching of the gated pairs
+    best = (0, 0.0)
+    options = [[None] + [track for (row, track) in pairs if row == measurement] for measurement in range(n_measurements)]
+    for choice in itertools.product(*options):
+        tracks = [track for track in choice if track is not None]
+        if len(tracks) != len(set(tracks)):
+            continue
+        cost = sum(pairs[row, track] for row, track in enumerate(choice) if track is not None)
+        best = max(best, (len(tracks), -cost))
+    return best
+
+
+def test_gnn_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(400):
+        n_measurements, n_tracks = rng.integers(1, 6, size=2)
+        gated = rng.random((n_measurements, n_tracks)) < 0.5
+        rows, cols = np.nonzero(gated)
+        costs = rng.random(len(rows))
+        assignments = gnn_assign(rows, cols, costs, n_measurements, n_tracks)
+
+        pairs = dict(zip(zip(rows.tolist(), cols.tolist()), costs.tolist()))
+        picked = [(row, track) for row, track in enumerate(assignments.tolist()) if track >= 0]
+        assert all(pair in pairs for pair in picked)
+        assert len({track for _, track in picked}) == len(picked)
+        count, cost = len(picked), sum(pairs[pair] for pair in picked)
+        best_count, best_cost = brute_force(pairs, n_measurements)
+        assert count == best_count
+        assert -cost == pytest.approx(best_cost)
+
+
+def test_gnn_and_first_fit_differ_on_close_targets():
+    # Tracks 0 and 1 at ranges 100 and 108; the plot at 104 gates both and the plot at 95 only
+    # track 0. First-fit gives the first plot to track 0 and the second starts a track; GNN
+    # assigns both.
+    scans = ([[10.0, 5.0, 100.0, 0.0], [10.0, 5.0, 108.0, 0.0]], [[10.0, 5.0, 104.0, 0.0], [10.0, 5.0, 95.0, 0.0]])
+    events = {}
+    for method in ("first_fit", "gnn"):
+        tracker = Tracker(2.0, 10.0, gating=RangeGate(10.0), assignment=method)
+        tracker.process_scan(scans[0])
+        events[method] = tracker.process_scan(scans[1])[["code", "track_id"]].tolist()
+    assert events["first_fit"] == [(ASSIGNED, 0), (INITIATED, 2)]
+    assert events["gnn"] == [(ASSIGNED, 1), (ASSIGNED, 0)]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from checkpoint import HEADER_DTYPE, Checkpointer, read_checkpoint, restore, snapshot, write_checkpoint
+from confirmation import MofN
+from gating import chi2_gate
+from scenario import scenario_for_size, split_scans
+from tracker import Tracker
+
+
+@pytest.fixture(scope="module")
+def scans():
+    return split_scans(scenario_for_size(2000, n_scans=20, seed=2))
+
+
+@pytest.mark.parametrize("options", [
+    {"firm_threshold": 3, "max_misses": 3},
+    {"confirmation": MofN((3, 5), (3, 3), firm_delete=(5, 6)), "assignment": "gnn"},
+    {"firm_threshold": 3, "max_misses": 2, "alpha_beta": (0.8, 0.5), "max_speed": 50.0,
+     "gating": chi2_gate(2.0, 10.0, 7.8), "covariance": np.diag([4.0, 4.0, 1.0]), "process_noise": 2.0},
+])
+def test_restored_tracker_resumes_identically(tmp_path, scans, options):
+    tracker = Tracker(2.0, 10.0, **options)
+    for scan in scans[:10]:
+        tracker.process_scan(scan)
+    path = tmp_path / "state.trk"
+    write_checkpoint(path, *snapshot(tracker))
+    restored = restore(path)
+
+    assert restored.scan_count == tracker.scan_count
+    assert restored.plot_count == tracker.plot_count
+    assert restored.gating.spec() == tracker.gating.spec()
+    for scan in scans[10:]:
+        np.testing.assert_array_equal(restored.process_scan(scan), tracker.process_scan(scan))
+
+
+def test_checkpointer_writes_every_n_scans(tmp_path, scans):
+    path = tmp_path / "state.trk"
+    checkpointer = Checkpointer(Tracker(2.0, 10.0, firm_threshold=3, max_misses=3), path, every=4)
+    for scan in scans[:9]:
+        checkpointer.process_scan(scan)
+    checkpointer.close(final=False)
+    # A snapshot is skipped while the previous write is still running
+    assert checkpointer.written + checkpointer.skipped == 2
+    metadata, _ = read_checkpoint(path)
+    assert metadata["scan_count"] in (4, 8)
+
+
+def test_checkpointer_writes_final_state_on_exit(tmp_path, scans):
+    path = tmp_path / "state.trk"
+    with Checkpointer(Tracker(2.0, 10.0, firm_threshold=3, max_misses=3), path, every=100) as checkpointer:
+        for scan in scans[:3]:
+            checkpointer.process_scan(scan)
+    assert restore(path).scan_count == 3
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "state.trk"
+    path.write_bytes(b"not a checkpoint")
+    with pytest.raises(ValueError, match="not a tracker checkpoint"):
+        read_checkpoint(path)
+
+
+def test_rejects_other_versions(tmp_path):
+    path = tmp_path / "state.trk"
+    write_checkpoint(path, *snapshot(Tracker(2.0, 10.0)))
+    data = bytearray(path.read_bytes())
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1).copy()
+    header["version"] += 1
+    data[:HEADER_DTYPE.itemsize] = header.tobytes()
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="unsupported checkpoint version"):
+        read_checkpoint(path)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from confirmation import MofN
+from events import FIRMED
+from track_store import FIRM, TrackStore
+from tracker import Tracker
+
+
+def new_track():
+    store = TrackStore()
+    slots = store.create(np.zeros((1, 3)), np.zeros(1), np.zeros((1, 5)))
+    return store, slots
+
+
+def run(rule, store, slots, hits):
+    # Advances the track over one scan per entry of hits; returns the scans (1-based, the
+    # creation scan being 1) after which it was confirmed
+    confirmed = []
+    for scan, hit in enumerate(hits, start=2):
+        rule.advance(store, slots if hit else slots[:0])
+        if len(rule.confirmed(store, slots)):
+            confirmed.append(scan)
+    return confirmed
+
+
+def test_confirm_needs_m_hits_in_last_n_scans():
+    rule = MofN(confirm=(3, 5))
+    store, slots = new_track()
+    # Hits on scans 1, 3 and 5: three in the five scans up to 5
+    assert run(rule, store, slots, [False, True, False, True])[:1] == [5]
+    store, slots = new_track()
+    # Hits on scans 1, 4 and 7 are never three within five scans
+    assert run(rule, store, slots, [False, False, True, False, False, True]) == []
+
+
+def test_confirm_none_never_confirms():
+    tracker = Tracker(2.0, 10.0, confirmation=MofN(confirm=None, delete=(3, 3)))
+    for _ in range(4):
+        events = tracker.process_scan([[10.0, 5.0, 100.0, 3.0]])
+        assert FIRMED not in events["code"].tolist()
+    assert tracker.store.status[tracker.store.slots[0]] != FIRM
+
+
+def test_confirm_ignores_firm_tracks():
+    rule = MofN(confirm=(1, 1))
+    store, slots = new_track()
+    store.status[slots] = FIRM
+    assert len(rule.confirmed(store, slots)) == 0
+
+
+def test_delete_counts_misses_since_creation_only():
+    rule = MofN(delete=(3, 3))
+    store, slots = new_track()
+    for _ in range(2):
+        rule.advance(store, slots[:0])
+        # The scans before the track existed are not misses
+        assert len(rule.deleted(store, slots)) == 0
+    rule.advance(store, slots[:0])
+    np.testing.assert_array_equal(rule.deleted(store, slots), slots)
+
+
+def test_delete_resets_with_hits():
+    rule = MofN(delete=(3, 4))
+    store, slots = new_track()
+    for hit in (False, True, False, True, False):
+        rule.advance(store, slots if hit else slots[:0])
+        assert len(rule.deleted(store, slots)) == 0
+    rule.advance(store, slots[:0])
+    np.testing.assert_array_equal(rule.deleted(store, slots), slots)
+
+
+def test_firm_tracks_follow_firm_delete():
+    store, slots = new_track()
+    store.status[slots] = FIRM
+    kept, dropped = MofN(delete=(1, 1)), MofN(delete=(1, 1), firm_delete=(2, 2))
+    for _ in range(3):
+        kept.advance(store, slots[:0])
+    assert len(kept.deleted(store, slots)) == 0
+    np.testing.assert_array_equal(dropped.deleted(store, slots), slots)
+
+
+@pytest.mark.parametrize("rule", [(0, 3), (4, 3), (1, 65)])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        MofN(confirm=rule)
+
+
+def test_rules_round_trip():
+    rule = MofN(confirm=(2, 4), delete=(3, 3), firm_delete=(5, 8))
+    assert MofN(*rule.rules()).rules() == ((2, 4), (3, 3), (5, 8))
+
+
+def test_tracker_firms_on_mth_hit():
+    tracker = Tracker(2.0, 10.0, confirmation=MofN(confirm=(3, 4), delete=(2, 2)))
+    plot = [[10.0, 5.0, 100.0, 3.0]]
+    firmed = []
+    for scan in range(5):
+        events = tracker.process_scan(plot)
+        if (events["code"] == FIRMED).any():
+            firmed.append(scan)
+    assert firmed == [2]
@@ -0,0 +1,12 @@
+import numpy as np
+import pytest
+
+from equivalence import SCRIPTS, check, random_case
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("name", SCRIPTS)
+def test_presets_match_legacy_scripts(name, seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(5):
+        assert check(name, *random_case(rng, 150)) is None
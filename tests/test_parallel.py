@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from events import ASSIGNED, INITIATED
+from gating import DopplerGate, RangeGate, or_gate
+from parallel import sector_margin, track_partitioned
+from scenario import generate_scenario, split_scans
+from tracker import Tracker
+
+
+def serial_labels(scenario, **options):
+    tracker = Tracker(2.0, 10.0, **options)
+    labels = []
+    for scan in split_scans(scenario):
+        events = tracker.process_scan(scan)
+        labels.append(events[(events["code"] == ASSIGNED) | (events["code"] == INITIATED)]["track_id"])
+    return np.concatenate(labels)
+
+
+@pytest.mark.parametrize("options", [
+    {"gating": RangeGate(10.0)},
+    {"gating": DopplerGate(2.0) & RangeGate(10.0), "firm_threshold": 3, "max_misses": 2},
+])
+def test_partitioned_matches_serial(options):
+    scenario = generate_scenario(200, 8, 200, min_range=100, max_range=300, max_speed=5, seed=3)
+    # The margin must be narrower than a sector for the partitioning to be exercised
+    assert sector_margin(scenario.plots, 20.0) < 45.0
+    labels = track_partitioned(scenario.plots, scenario.scan, 2.0, 10.0, n_sectors=8, n_workers=2, **options)
+    np.testing.assert_array_equal(labels, serial_labels(scenario, **options))
+
+
+def test_partitioned_counts_misses_of_sectors_without_plots():
+    # The track at azimuth 10 misses scans 1-3, when only the far sector has plots
+    azimuths = [10.0, 200.0, 200.0, 200.0, 10.0]
+    plots = np.array([[az, 5.0, 100.0, 0.0, float(scan)] for scan, az in enumerate(azimuths)])
+    options = {"gating": RangeGate(10.0), "firm_threshold": 3, "max_misses": 1}
+    labels = track_partitioned(plots, np.arange(len(plots)), 2.0, 10.0, n_sectors=4, n_workers=2, **options)
+    np.testing.assert_array_equal(labels, serial_labels(SimpleNamespace(plots=plots, scan=np.arange(5)), **options))
+    np.testing.assert_array_equal(labels, [0, 1, 1, 1, 2])
+
+
+def test_partitioned_rejects_doppler_only_gates():
+    scenario = generate_scenario(10, 2, 5, seed=0)
+    for gating in (None, or_gate(2.0, 10.0), DopplerGate(2.0)):
+        with pytest.raises(ValueError):
+            track_partitioned(scenario.plots, scenario.scan, 2.0, 10.0, n_sectors=2, gating=gating)
+
+
+def test_sector_margin_uses_horizontal_range():
+    plots = np.array([[0.0, 60.0, 40.0, 0.0, 0.0]])
+    # 40 m at 60 degrees elevation is 20 m out horizontally
+    assert sector_margin(plots, 10.0) == pytest.approx(30.0)
+    assert sector_margin(plots, 25.0) == 180.0
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from recording import COLUMNS, Recording, RecordingWriter, from_csv, from_tuples, write_recording
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    plots = rng.random((10, len(COLUMNS)))
+    scan_ids = [0, 0, 0, 1, 1, 3, 3, 3, 3, 4]
+    path = tmp_path / "plots.trk"
+    write_recording(path, plots, scan_ids)
+
+    recording = Recording(path)
+    assert len(recording) == 4
+    assert isinstance(recording.plots, np.memmap)
+    for index, (start, stop) in enumerate([(0, 3), (3, 5), (5, 9), (9, 10)]):
+        np.testing.assert_array_equal(recording.scan(index), plots[start:stop])
+    np.testing.assert_array_equal(recording.records()["range"], plots[:, 2])
+
+
+def test_scans_continue_across_writes(tmp_path):
+    path = tmp_path / "plots.trk"
+    plots = np.arange(24, dtype=float).reshape(6, 4)
+    with RecordingWriter(path) as writer:
+        writer.write(plots[:2], [7, 7])
+        writer.write(plots[2:4], [7, 8])
+        writer.write_scan(plots[4:])
+    recording = Recording(path)
+    assert [len(scan) for scan in recording.scans()] == [3, 1, 2]
+    # Missing time and sensor columns are filled with zeros
+    np.testing.assert_array_equal(recording.scan(0)[:, :4], plots[:3])
+    assert not recording.plots[:, 4:].any()
+
+
+def test_from_tuples_uses_list_position_without_time(tmp_path):
+    path = tmp_path / "plots.trk"
+    from_tuples([(10, 5, 100, 1), (11, 5, 101, 1), (12, 5, 102, 1)], path, window=2.0)
+    recording = Recording(path)
+    assert [scan[:, 4].tolist() for scan in recording.scans()] == [[0.0, 1.0], [2.0]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_from_csv_chunk_boundaries(tmp_path, chunk_size):
+    csv_path = tmp_path / "plots.csv"
+    rows = [(10 + index, 5, 100 + index, 1, 0.4 * index) for index in range(7)]
+    csv_path.write_text("time,azimuth,elevation,range,doppler\n" + "".join(
+        f"{time},{az},{el},{r},{doppler}\n" for az, el, r, doppler, time in rows
+    ))
+    path = tmp_path / "plots.trk"
+    from_csv(csv_path, path, window=1.0, chunk_size=chunk_size)
+    recording = Recording(path)
+    # Times 0, 0.4, 0.8 | 1.2, 1.6 | 2.0, 2.4
+    assert [len(scan) for scan in recording.scans()] == [3, 2, 2]
+    np.testing.assert_allclose(recording.plots[:, :5], rows)
+
+
+def test_from_csv_scan_column(tmp_path):
+    csv_path = tmp_path / "plots.csv"
+    csv_path.write_text("azimuth,elevation,range,doppler,time,scan\n" + "".join(
+        f"{index},0,100,0,{index},{scan}\n" for index, scan in enumerate([0, 0, 1, 1, 1, 2])
+    ))
+    path = tmp_path / "plots.trk"
+    from_csv(csv_path, path, chunk_size=2)
+    assert [len(scan) for scan in Recording(path).scans()] == [2, 3, 1]
+
+
+def test_rejects_bad_files(tmp_path):
+    csv_path = tmp_path / "plots.csv"
+    csv_path.write_text("azimuth,elevation,range\n1,2,3\n")
+    with pytest.raises(ValueError, match="missing columns"):
+        from_csv(csv_path, tmp_path / "plots.trk")
+    path = tmp_path / "other.trk"
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError, match="not a plot recording"):
+        Recording(path)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from scan_assembler import MAX_GAP_WINDOWS, ScanAssembler, assemble
+
+
+def plot(time, az=0.0):
+    return (az, 0.0, 100.0, 0.0, time)
+
+
+def times(batch):
+    return batch.plots[:, 4].tolist()
+
+
+def test_plots_are_ordered_within_their_window():
+    assembler = ScanAssembler(1.0)
+    for time in (0.5, 0.2, 0.9):
+        assert assembler.push(plot(time)) == []
+    [batch] = assembler.push(plot(1.5))
+    assert times(batch) == [0.2, 0.5, 0.9]
+    assert batch.window == 1.0 and batch.last
+    [batch] = assembler.flush()
+    assert times(batch) == [1.5]
+
+
+def test_late_plots_are_dropped():
+    assembler = ScanAssembler(1.0, max_lateness=0.5)
+    assembler.push(plot(0.2))
+    # Still within the lateness of window [0, 1)
+    assert assembler.push(plot(1.4)) == []
+    [batch] = assembler.push(plot(1.6))
+    assert times(batch) == [0.2]
+    assert assembler.push(plot(0.9)) == []
+    assert assembler.dropped == 1
+    # Late, but its window has not been released yet
+    assembler.push(plot(1.2))
+    assert [times(batch) for batch in assembler.flush()] == [[1.2, 1.4, 1.6]]
+
+
+def test_large_windows_are_split_into_batches():
+    batches = list(assemble([plot(0.1 * index) for index in range(10)], 1.0, max_batch=4))
+    assert [len(batch.plots) for batch in batches] == [4, 4, 2]
+    assert [batch.last for batch in batches] == [False, False, True]
+    assert {batch.window for batch in batches} == {1.0}
+    np.testing.assert_allclose(np.concatenate([batch.plots for batch in batches])[:, 4], 0.1 * np.arange(10))
+
+
+def test_gaps_are_released_as_empty_scans():
+    batches = list(assemble([plot(0.5), plot(3.5)], 1.0))
+    assert [(batch.window, len(batch.plots)) for batch in batches] == [(1.0, 1), (2.0, 0), (3.0, 0), (4.0, 1)]
+    assert batches[1].plots.shape == (0, 5)
+
+
+def test_long_gaps_are_cut_short():
+    batches = list(assemble([plot(0.5), plot(1000.5)], 1.0))
+    assert len(batches) == MAX_GAP_WINDOWS + 2
+    assert times(batches[-1]) == [1000.5]
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from sweep import score
+
+
+def test_score_hand_labelled():
+    # Track 0 follows target 0 but takes one plot of target 1; track 1 follows target 1;
+    # track 2 is two clutter plots; tracks 3 and 4 never reach two plots. Target 2 is seen once.
+    labels = np.array([0, 2, 0, 2, 0, 1, 1, 3, 4])
+    truth = np.array([0, -1, 0, -1, 1, 1, 1, -1, 2])
+    times = np.array([0.0, 0.0, 1.0, 1.0, 1.5, 2.0, 3.0, 3.0, 3.0])
+    scores = score(labels, truth, times, firm_threshold=2, n_scans=4)
+
+    assert scores["firm_tracks"] == 3
+    # Majority plots of the target tracks 0 and 1 over all their plots; clutter track 2 is
+    # left out of both
+    assert scores["purity"] == pytest.approx((2 + 2) / (3 + 2))
+    assert scores["false_tracks_per_scan"] == pytest.approx(1 / 4)
+    assert scores["false_track_fraction"] == pytest.approx(1 / 3)
+    # Target 0: seen at 0, firm at 1; target 1: seen at 1.5, firm at 3
+    assert scores["time_to_firm"] == pytest.approx((1.0 + 1.5) / 2)
+    assert scores["targets_firm"] == pytest.approx(2 / 3)
+
+
+def test_score_without_firm_tracks():
+    scores = score(np.array([0, 1]), np.array([0, -1]), np.array([0.0, 1.0]), firm_threshold=2, n_scans=2)
+    assert scores["firm_tracks"] == 0
+    assert scores["purity"] is None
+    assert scores["false_track_fraction"] is None
+    assert scores["time_to_firm"] is None
+    assert scores["targets_firm"] == 0.0
@@ -0,0 +1,42 @@
+import numpy as np
+
+from confirmation import MofN
+from events import DELETED, INITIATED
+from gating import HISTORY, RangeGate
+from tracker import Tracker
+
+PLOT = [[10.0, 5.0, 100.0, 3.0]]
+
+
+def test_empty_scans_count_misses():
+    tracker = Tracker(2.0, 10.0, firm_threshold=3, max_misses=1, gating=RangeGate(10.0))
+    tracker.process_scan(PLOT)
+    assert len(tracker.process_scan(np.empty((0, 4)))) == 0
+    events = tracker.process_scan([])
+    assert events["code"].tolist() == [DELETED]
+    assert len(tracker.store.slots) == 0
+    assert tracker.scan_count == 3
+
+
+def test_empty_scans_advance_confirmation():
+    tracker = Tracker(2.0, 10.0, confirmation=MofN(confirm=(2, 3), delete=(3, 3)))
+    tracker.process_scan(PLOT)
+    for _ in range(2):
+        tracker.process_scan(np.empty((0, 4)))
+    slot = tracker.store.slots[0]
+    assert tracker.store.age[slot] == 3
+    assert tracker.store.hit_mask[slot] == 0b100
+    assert tracker.process_scan(np.empty((0, 4)))["code"].tolist() == [DELETED]
+
+
+def test_reused_slot_forgets_previous_track():
+    tracker = Tracker(2.0, 10.0, max_misses=1, gating=RangeGate(10.0, over=HISTORY), history_length=4)
+    for scan in ([[10.0, 5.0, 100.0, 0.0]], [[10.0, 5.0, 101.0, 0.0]], [[10.0, 5.0, 500.0, 0.0]]):
+        tracker.process_scan(scan)
+    assert DELETED in tracker.process_scan([[10.0, 5.0, 500.0, 0.0]])["code"].tolist()
+    # Track 2 takes the slot of the deleted track 0
+    tracker.process_scan([[10.0, 5.0, 500.0, 0.0], [10.0, 5.0, 900.0, 0.0]])
+    assert tracker.store.slots[2] == 0
+    # Near the dead track's plots, but far from everything track 2 has seen
+    events = tracker.process_scan([[10.0, 5.0, 100.5, 0.0]])
+    assert events["code"].tolist() == [INITIATED]
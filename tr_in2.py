@@ -1,5 +1,10 @@
+import sys
+
 import numpy as np
 
+from events import ASSIGNED, DEBUG, DOPPLER_GATE, FIRMED, INITIATED, RANGE_GATE, FileSink, NullSink
+from tracker import Tracker
+
 def sph2cart(az, el, r):
     az = np.radians(az)
     el = np.radians(el)
@@ -14,7 +19,8 @@ def doppler_correlation(doppler_1, doppler_2, doppler_threshold):
 def range_gate(distance, range_threshold):
     return distance < range_threshold
 
-def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_threshold):
+def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_threshold, sink=None):
+    sink = NullSink() if sink is None else sink
     tracks = []
     track_ids = {}
     miss_counts = {}
@@ -22,7 +28,7 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
     tentative_ids = {}
     firm_ids = set()
 
-    for measurement in measurements:
+    for index, measurement in enumerate(measurements):
         measurement_cartesian = sph2cart(measurement[0], measurement[1], measurement[2])
         measurement_doppler = measurement[3]
 
@@ -46,13 +52,13 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
                         miss_counts[track_id] = 0
                         if hit_counts[track_id] >= firm_threshold:
                             firm_ids.add(track_id)
-                            print(f"Track ID {track_id} is now firm.")
+                            sink.emit_event(FIRMED, track_id, index)
                     else:
                         tentative_ids[track_id] = True
                         hit_counts[track_id] = 1
                         miss_counts[track_id] = 0
                 tracks[track_id].append(measurement)
-                print(f"Measurement {measurement} assigned to Track ID {track_id}: Both Doppler and Range conditions satisfied.")
+                sink.emit_event(ASSIGNED, track_id, index, DOPPLER_GATE | RANGE_GATE)
                 assigned = True
                 break
             elif doppler_correlated or range_satisfied:
@@ -64,13 +70,13 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
                             miss_counts[track_id] = 0
                             if hit_counts[track_id] >= firm_threshold:
                                 firm_ids.add(track_id)
-                                print(f"Track ID {track_id} is now firm.")
+                                sink.emit_event(FIRMED, track_id, index)
                         else:
                             tentative_ids[track_id] = True
                             hit_counts[track_id] = 1
                             miss_counts[track_id] = 0
                     tracks[track_id].append(measurement)
-                    print(f"Measurement {measurement} assigned to Track ID {track_id}: Doppler condition satisfied.")
+                    sink.emit_event(ASSIGNED, track_id, index, DOPPLER_GATE)
                     assigned = True
                     break
                 elif range_satisfied:
@@ -80,13 +86,13 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
                             miss_counts[track_id] = 0
                             if hit_counts[track_id] >= firm_threshold:
                                 firm_ids.add(track_id)
-                                print(f"Track ID {track_id} is now firm.")
+                                sink.emit_event(FIRMED, track_id, index)
                         else:
                             tentative_ids[track_id] = True
                             hit_counts[track_id] = 1
                             miss_counts[track_id] = 0
                     tracks[track_id].append(measurement)
-                    print(f"Measurement {measurement} assigned to Track ID {track_id}: Range condition satisfied.")
+                    sink.emit_event(ASSIGNED, track_id, index, RANGE_GATE)
                     assigned = True
                     break
 
@@ -98,10 +104,16 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
             miss_counts[track_id] = 0
             hit_counts[track_id] = 1
             tentative_ids[track_id] = True
-            print(f"Measurement {measurement} initiated a new Track ID {track_id}.")
+            sink.emit_event(INITIATED, track_id, index)
 
     return tracks, track_ids, miss_counts, hit_counts, firm_ids
 
+def initialize_tracks_batch(scans, doppler_threshold, range_threshold, firm_threshold, sink=None):
+    tracker = Tracker(doppler_threshold, range_threshold, firm_threshold=firm_threshold, sink=sink)
+    for scan in scans:
+        tracker.process_scan(scan)
+    return tracker.store
+
 # Sample measurements (azimuth, elevation, range, doppler)
 sample_measurements = [
     (10, 5, 100, 5),
@@ -114,23 +126,26 @@ sample_measurements = [
     (55, 25, 515, 55),
 ]
 
-# Parameters for gating
-doppler_threshold = 2.0  # Doppler gate threshold
-range_threshold = 10.0   # Range gate threshold in Cartesian distance
-firm_threshold = 3       # Number of continuous hits needed to firm a track
-
-# Initialize tracks
-tracks, track_ids, miss_counts, hit_counts, firm_ids = initialize_tracks(
-    sample_measurements, doppler_threshold, range_threshold, firm_threshold
-)
-
-# Output the tracks and their associated measurements
-for track_id, track in enumerate(tracks):
-    print(f"Track ID {track_id}:")
-    for measurement in track:
-        print(f"  Measurement: {measurement}")
-    print(f"  Hits: {hit_counts[track_id]}, Misses: {miss_counts[track_id]}")
-    if track_id in firm_ids:
-        print(f"  Track ID {track_id} is firm.")
-    else:
-        print(f"  Track ID {track_id} is tentative.")
+if __name__ == "__main__":
+    # Parameters for gating
+    doppler_threshold = 2.0  # Doppler gate threshold
+    range_threshold = 10.0   # Range gate threshold in Cartesian distance
+    firm_threshold = 3       # Number of continuous hits needed to firm a track
+
+    # Initialize tracks, writing the association log to stdout
+    sink = FileSink(sys.stdout, level=DEBUG, measurements=sample_measurements)
+    tracks, track_ids, miss_counts, hit_counts, firm_ids = initialize_tracks(
+        sample_measurements, doppler_threshold, range_threshold, firm_threshold, sink=sink
+    )
+    sink.flush()
+
+    # Output the tracks and their associated measurements
+    for track_id, track in enumerate(tracks):
+        print(f"Track ID {track_id}:")
+        for measurement in track:
+            print(f"  Measurement: {measurement}")
+        print(f"  Hits: {hit_counts[track_id]}, Misses: {miss_counts[track_id]}")
+        if track_id in firm_ids:
+            print(f"  Track ID {track_id} is firm.")
+        else:
+            print(f"  Track ID {track_id} is tentative.")
@@ -1,5 +1,10 @@
+import sys
+
 import numpy as np
 
+from events import ASSIGNED, DELETED, DEBUG, DOPPLER_GATE, FIRMED, INITIATED, RANGE_GATE, FileSink, NullSink
+from tracker import Tracker
+
 def sph2cart(az, el, r):
     az = np.radians(az)
     el = np.radians(el)
@@ -14,23 +19,25 @@ def doppler_correlation(doppler_1, doppler_2, doppler_threshold):
 def range_gate(distance, range_threshold):
     return distance < range_threshold
 
-def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_threshold):
+def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_threshold, sink=None):
+    sink = NullSink() if sink is None else sink
     tracks = []
     track_ids = {}
     miss_counts = {}
     hit_counts = {}
     tentative_ids = {}
     firm_ids = set()
+    active_ids = []  # Tracks that have not been removed, in creation order
 
-    for measurement in measurements:
+    for index, measurement in enumerate(measurements):
         measurement_cartesian = sph2cart(measurement[0], measurement[1], measurement[2])
         measurement_doppler = measurement[3]
 
         # Flag to determine if measurement was assigned
         assigned = False
 
-        for track_id, track in enumerate(tracks):
-            last_measurement = track[-1]
+        for track_id in active_ids:
+            last_measurement = tracks[track_id][-1]
             last_cartesian = sph2cart(last_measurement[0], last_measurement[1], last_measurement[2])
             last_doppler = last_measurement[3]
 
@@ -39,56 +46,23 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
             doppler_correlated = doppler_correlation(measurement_doppler, last_doppler, doppler_threshold)
             range_satisfied = range_gate(distance, range_threshold)
 
-            if doppler_correlated and range_satisfied:
+            if doppler_correlated or range_satisfied:
                 if track_id not in firm_ids:
                     if track_id in tentative_ids:
                         hit_counts[track_id] += 1
                         miss_counts[track_id] = 0
                         if hit_counts[track_id] >= firm_threshold:
                             firm_ids.add(track_id)
-                            print(f"Track ID {track_id} is now firm.")
+                            sink.emit_event(FIRMED, track_id, index)
                     else:
                         tentative_ids[track_id] = True
                         hit_counts[track_id] = 1
                         miss_counts[track_id] = 0
                 tracks[track_id].append(measurement)
-                print(f"Measurement {measurement} assigned to Track ID {track_id}: Both Doppler and Range conditions satisfied.")
+                gates = (DOPPLER_GATE if doppler_correlated else 0) | (RANGE_GATE if range_satisfied else 0)
+                sink.emit_event(ASSIGNED, track_id, index, gates)
                 assigned = True
                 break
-            elif doppler_correlated or range_satisfied:
-                # Prefer Doppler correlation if both conditions are not met
-                if doppler_correlated:
-                    if track_id not in firm_ids:
-                        if track_id in tentative_ids:
-                            hit_counts[track_id] += 1
-                            miss_counts[track_id] = 0
-                            if hit_counts[track_id] >= firm_threshold:
-                                firm_ids.add(track_id)
-                                print(f"Track ID {track_id} is now firm.")
-                        else:
-                            tentative_ids[track_id] = True
-                            hit_counts[track_id] = 1
-                            miss_counts[track_id] = 0
-                    tracks[track_id].append(measurement)
-                    print(f"Measurement {measurement} assigned to Track ID {track_id}: Doppler condition satisfied.")
-                    assigned = True
-                    break
-                elif range_satisfied:
-                    if track_id not in firm_ids:
-                        if track_id in tentative_ids:
-                            hit_counts[track_id] += 1
-                            miss_counts[track_id] = 0
-                            if hit_counts[track_id] >= firm_threshold:
-                                firm_ids.add(track_id)
-                                print(f"Track ID {track_id} is now firm.")
-                        else:
-                            tentative_ids[track_id] = True
-                            hit_counts[track_id] = 1
-                            miss_counts[track_id] = 0
-                    tracks[track_id].append(measurement)
-                    print(f"Measurement {measurement} assigned to Track ID {track_id}: Range condition satisfied.")
-                    assigned = True
-                    break
 
         if not assigned:
             # Create a new track
@@ -98,20 +72,35 @@ def initialize_tracks(measurements, doppler_threshold, range_threshold, firm_thr
             miss_counts[track_id] = 0
             hit_counts[track_id] = 1
             tentative_ids[track_id] = True
-            print(f"Measurement {measurement} initiated a new Track ID {track_id}.")
+            active_ids.append(track_id)
+            sink.emit_event(INITIATED, track_id, index)
 
-        # Increment miss count for all tracks that were not assigned this measurement
-        for track_id in range(len(tracks)):
-            if track_id not in firm_ids and not assigned:
-                if track_id in miss_counts:
+            # Increment miss count for all tentative tracks, dropping removed ones from the active set
+            survivors = []
+            for track_id in active_ids:
+                if track_id not in firm_ids:
                     miss_counts[track_id] += 1
                     if miss_counts[track_id] > firm_threshold:
-                        print(f"Track ID {track_id} has too many misses and will be removed.")
-                        # Optionally, remove track if too many misses
+                        sink.emit_event(DELETED, track_id, -1)
                         tracks[track_id] = []
+                        continue
+                survivors.append(track_id)
+            active_ids = survivors
 
     return tracks, track_ids, miss_counts, hit_counts, firm_ids
 
+def initialize_tracks_batch(scans, doppler_threshold, range_threshold, firm_threshold, sink=None, confirmation=None):
+    # confirmation, a confirmation.MofN, replaces the hit and miss counts and firm_threshold is ignored
+    if confirmation is None:
+        tracker = Tracker(
+            doppler_threshold, range_threshold, firm_threshold=firm_threshold, max_misses=firm_threshold, sink=sink
+        )
+    else:
+        tracker = Tracker(doppler_threshold, range_threshold, sink=sink, confirmation=confirmation)
+    for scan in scans:
+        tracker.process_scan(scan)
+    return tracker.store
+
 # Sample measurements (azimuth, elevation, range, doppler)
 sample_measurements = [
     (10, 5, 100, 5),
@@ -151,23 +140,26 @@ sample_measurements = [
     (66, 35, 600, 66),
 ]
 
-# Parameters for gating
-doppler_threshold = 2.0  # Doppler gate threshold
-range_threshold = 10.0   # Range gate threshold in Cartesian distance
-firm_threshold = 3       # Number of continuous hits needed to firm a track
-
-# Initialize tracks
-tracks, track_ids, miss_counts, hit_counts, firm_ids = initialize_tracks(
-    sample_measurements, doppler_threshold, range_threshold, firm_threshold
-)
-
-# Output the tracks and their associated measurements
-for track_id, track in enumerate(tracks):
-    print(f"Track ID {track_id}:")
-    for measurement in track:
-        print(f"  Measurement: {measurement}")
-    print(f"  Hits: {hit_counts.get(track_id, 0)}, Misses: {miss_counts.get(track_id, 0)}")
-    if track_id in firm_ids:
-        print(f"  Track ID {track_id} is firm.")
-    else:
-        print(f"  Track ID {track_id} is tentative.")
+if __name__ == "__main__":
+    # Parameters for gating
+    doppler_threshold = 2.0  # Doppler gate threshold
+    range_threshold = 10.0   # Range gate threshold in Cartesian distance
+    firm_threshold = 3       # Number of continuous hits needed to firm a track
+
+    # Initialize tracks, writing the association log to stdout
+    sink = FileSink(sys.stdout, level=DEBUG, measurements=sample_measurements)
+    tracks, track_ids, miss_counts, hit_counts, firm_ids = initialize_tracks(
+        sample_measurements, doppler_threshold, range_threshold, firm_threshold, sink=sink
+    )
+    sink.flush()
+
+    # Output the tracks and their associated measurements
+    for track_id, track in enumerate(tracks):
+        print(f"Track ID {track_id}:")
+        for measurement in track:
+            print(f"  Measurement: {measurement}")
+        print(f"  Hits: {hit_counts.get(track_id, 0)}, Misses: {miss_counts.get(track_id, 0)}")
+        if track_id in firm_ids:
+            print(f"  Track ID {track_id} is firm.")
+        else:
+            print(f"  Track ID {track_id} is tentative.")
@@ -0,0 +1,191 @@
+import numpy as np
+
+from doppler_index import DopplerIndex
+from spatial_index import GridIndex
+
+FREE = 0
+TENTATIVE = 1
+FIRM = 2
+
+# Per-slot columns, each with the slot as its first axis
+COLUMNS = (
+    "status", "track_id", "hits", "misses", "hit_mask", "age", "xyz", "doppler", "velocity", "time",
+    "update_time", "history", "history_count", "covariance", "cholesky",
+)
+
+
+class TrackStore:
+    # Structure-of-arrays track state: one slot per live track, slots of dead tracks are
+    # reused, and each slot keeps a fixed-length ring buffer of its most recent plots
+    def __init__(self, capacity=64, history_length=16, fields=5, cell_size=None, initial_covariance=None,
+                 process_noise=0.0):
+        if capacity < 1 or history_length < 1:
+            raise ValueError("capacity and history_length must be positive")
+        # Position variance each head gains per unit of time it is predicted over
+        self.process_noise = process_noise
+        self.initial_covariance = np.eye(3) if initial_covariance is None else np.asarray(initial_covariance, dtype=float)
+        self.initial_cholesky = np.linalg.cholesky(self.initial_covariance)
+        self.capacity = capacity
+        self.history_length = history_length
+        self.fields = fields
+        self.size = 0
+        self.next_id = 0
+        self.free_slots = []
+        self.slots = {}
+
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.track_id = np.full(capacity, -1, dtype=np.int64)
+        self.hits = np.zeros(capacity, dtype=np.int32)
+        self.misses = np.zeros(capacity, dtype=np.int32)
+        # Per-scan hit history, bit 0 being the latest scan, and the number of scans seen
+        self.hit_mask = np.zeros(capacity, dtype=np.uint64)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.xyz = np.zeros((capacity, 3))
+        self.doppler = np.zeros(capacity)
+        # Kinematic state: velocity, the time xyz refers to, and the time of the last plot
+        self.velocity = np.zeros((capacity, 3))
+        self.time = np.zeros(capacity)
+        self.update_time = np.zeros(capacity)
+        self.history = np.full((capacity, history_length, fields), np.nan)
+        self.history_count = np.zeros(capacity, dtype=np.int64)
+        # Position covariance of each head and its lower Cholesky factor, for Mahalanobis gating
+        self.covariance = np.tile(self.initial_covariance, (capacity, 1, 1))
+        self.cholesky = np.tile(self.initial_cholesky, (capacity, 1, 1))
+
+        # With a cell size, heads are also indexed by position and by Doppler value
+        self.grid = GridIndex(cell_size) if cell_size else None
+        self.doppler_index = DopplerIndex() if cell_size else None
+
+    def __len__(self):
+        # Number of slots in use or previously used; gating runs over this prefix
+        return self.size
+
+    @property
+    def active(self):
+        return self.status[:self.size] != FREE
+
+    def live_slots(self):
+        return np.flatnonzero(self.active)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        fill = {"track_id": -1, "history": np.nan, "covariance": self.initial_covariance, "cholesky": self.initial_cholesky}
+        for name in COLUMNS:
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.capacity] = old
+            new[self.capacity:] = fill.get(name, 0)
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _record(self, slots, plots):
+        if len(slots) == 0:
+            return
+        plots = np.asarray(plots, dtype=float).reshape(len(slots), -1)
+        width = min(plots.shape[1], self.fields)
+        positions = self.history_count[slots] % self.history_length
+        self.history[slots, positions] = np.nan
+        self.history[slots, positions, :width] = plots[:, :width]
+        self.history_count[slots] += 1
+
+    def create(self, xyz, doppler, plots, velocity=0.0, time=0.0):
+        count = len(doppler)
+        reused = [self.free_slots.pop() for _ in range(min(count, len(self.free_slots)))]
+        fresh = count - len(reused)
+        self._grow(self.size + fresh)
+        slots = np.array(reused + list(range(self.size, self.size + fresh)), dtype=np.intp)
+        self.size += fresh
+
+        track_ids = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+        self.status[slots] = TENTATIVE
+        self.track_id[slots] = track_ids
+        self.hits[slots] = 1
+        self.misses[slots] = 0
+        self.hit_mask[slots] = 1
+        self.age[slots] = 1
+        self.xyz[slots] = xyz
+        self.doppler[slots] = doppler
+        self.velocity[slots] = velocity
+        self.time[slots] = time
+        self.update_time[slots] = time
+        # A reused slot must not keep the plots of its previous track
+        self.history[slots] = np.nan
+        self.history_count[slots] = 0
+        self.covariance[slots] = self.initial_covariance
+        self.cholesky[slots] = self.initial_cholesky
+        self._record(slots, plots)
+        self.slots.update(zip(track_ids.tolist(), slots.tolist()))
+        if self.grid is not None:
+            self.grid.insert(slots, xyz)
+            self.doppler_index.insert(slots, doppler)
+        return slots
+
+    def extend(self, slots, xyz, doppler, plots, velocity=None, time=None):
+        self.xyz[slots] = xyz
+        self.doppler[slots] = doppler
+        if velocity is not None:
+            self.velocity[slots] = velocity
+        if time is not None:
+            self.time[slots] = time
+            self.update_time[slots] = time
+        self._record(slots, plots)
+        if self.grid is not None:
+            self.grid.update(slots, xyz)
+            self.doppler_index.update(slots, doppler)
+
+    def rebuild_indexes(self):
+        # Re-derives the track id lookup and the spatial and Doppler indexes from the columns
+        live = self.live_slots()
+        self.slots = dict(zip(self.track_id[live].tolist(), live.tolist()))
+        if self.grid is not None:
+            self.grid = GridIndex(self.grid.cell_size)
+            self.grid.insert(live, self.xyz[live])
+            self.doppler_index = DopplerIndex()
+            self.doppler_index.insert(live, self.doppler[live])
+
+    def predict(self, time):
+        # Move every live head to its constant-velocity position at time, its covariance growing
+        # with the time predicted over; only heads that change grid cell touch the spatial index
+        live = self.live_slots()
+        if self.process_noise:
+            aged = live[self.time[live] != time]
+            growth = self.process_noise * np.abs(time - self.time[aged])
+            self.set_covariance(aged, self.covariance[aged] + growth[:, None, None] * np.eye(3))
+        moving = live[self.velocity[live].any(axis=1) & (self.time[live] != time)]
+        self.xyz[moving] += self.velocity[moving] * (time - self.time[moving])[:, None]
+        self.time[live] = time
+        if self.grid is not None:
+            self.grid.update(moving, self.xyz[moving])
+
+    def head_at(self, slots, times):
+        # Constant-velocity positions of the heads of slots at times, without moving them
+        return self.xyz[slots] + self.velocity[slots] * (times - self.time[slots])[:, None]
+
+    def set_covariance(self, slots, covariance):
+        # Only the changed slots are refactorized
+        self.covariance[slots] = covariance
+        self.cholesky[slots] = np.linalg.cholesky(self.covariance[slots])
+
+    def remove(self, slots):
+        slots = np.atleast_1d(slots)
+        slots = slots[self.status[slots] != FREE]
+        for track_id in self.track_id[slots].tolist():
+            del self.slots[track_id]
+        self.status[slots] = FREE
+        self.track_id[slots] = -1
+        self.free_slots.extend(slots.tolist())
+        if self.grid is not None:
+            self.grid.remove(slots)
+            self.doppler_index.remove(slots)
+
+    def recent(self, slot):
+        # Up to history_length most recent plots of a slot, oldest first
+        count = self.history_count[slot]
+        kept = min(count, self.history_length)
+        positions = (count - kept + np.arange(kept)) % self.history_length
+        return self.history[slot, positions]
@@ -0,0 +1,178 @@
+import numpy as np
+
+from events import ASSIGNED, DELETED, FIRMED, INITIATED, Event, NullSink, make_records
+from gating import or_gate
+from kinematics import alpha_beta_update, clip_speed, plot_times, radial_velocity
+from metrics import NULL_METRICS
+from scan_gating import associate, to_cartesian
+from track_store import FIRM, TENTATIVE, TrackStore
+
+
+class Tracker:
+    # Streaming form of initialize_tracks: gated first-fit association, one scan at a time.
+    # firm_threshold=None never firms tracks (test_tr_in1), max_misses=None never deletes (tr_in2).
+    # miss_rule="scan" counts one miss per scan without a plot; "unassigned" counts every plot
+    # that started a new track, as tr_inf.initialize_tracks does. assignment="gnn" replaces
+    # first-fit with a global nearest-neighbour solution of each scan. alpha_beta=(alpha, beta)
+    # gates against constant-velocity predictions instead of the raw last plot. metrics, a
+    # metrics.Metrics, times each stage of a scan and counts its work. confirmation, a
+    # confirmation.MofN, replaces the firm_threshold/max_misses counts with M-of-N rules.
+    # gating, a gating.Gate, replaces the OR of the Doppler and range gates; covariance is the
+    # position covariance of a plot, which new tracks start with, for Mahalanobis gates. A head
+    # that is the raw last plot keeps it; with alpha_beta each head's covariance grows by
+    # process_noise per unit of time predicted and shrinks with every plot it takes. max_speed
+    # bounds the estimated velocities, which also keeps the grid lookups of predicted heads cheap.
+    def __init__(self, doppler_threshold, range_threshold, firm_threshold=None, max_misses=None, history_length=16,
+                 sink=None, miss_rule="scan", assignment="first_fit", alpha_beta=None, metrics=None,
+                 confirmation=None, gating=None, covariance=None, process_noise=1.0, max_speed=None):
+        if miss_rule not in ("scan", "unassigned"):
+            raise ValueError(f"unknown miss_rule {miss_rule!r}")
+        if confirmation is not None and (firm_threshold is not None or max_misses is not None):
+            raise ValueError("confirmation replaces firm_threshold and max_misses; pass one or the other")
+        if assignment not in ("first_fit", "gnn"):
+            raise ValueError(f"unknown assignment {assignment!r}")
+        self.doppler_threshold = doppler_threshold
+        self.range_threshold = range_threshold
+        self.firm_threshold = firm_threshold
+        self.max_misses = max_misses
+        self.miss_rule = miss_rule
+        self.assignment = assignment
+        self.alpha_beta = alpha_beta
+        self.confirmation = confirmation
+        self.gating = or_gate(doppler_threshold, range_threshold) if gating is None else gating
+        self.process_noise = process_noise
+        self.max_speed = max_speed
+        # Predicted heads are looked up in cells twice the range gate, leaving half a cell for
+        # the heads to move within a slice of the scan (see gating.Gate.lookup)
+        cell_size = range_threshold if alpha_beta is None else 2 * range_threshold
+        self.store = TrackStore(
+            history_length=history_length, cell_size=cell_size, initial_covariance=covariance,
+            process_noise=process_noise,
+        )
+        self.sink = NullSink() if sink is None else sink
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.plot_count = 0
+        self.scan_count = 0
+
+    def process(self, scans):
+        # Scans can be an unbounded iterator; only the current scan is held in memory
+        for scan in scans:
+            for record in self.process_scan(scan).tolist():
+                yield Event._make(record)
+
+    def process_scan(self, batch):
+        # Returns the scan's events as an EVENT_DTYPE record array and hands them to the sink
+        scan = np.asarray(batch, dtype=float)
+        self.scan_count += 1
+        if scan.size == 0:
+            # No plots, but every track still takes the scan's miss and deletion rules
+            scan = scan.reshape(0, scan.shape[1] if scan.ndim == 2 else 4)
+
+        store = self.store
+        metrics = self.metrics
+        if metrics.enabled:
+            metrics.start_scan()
+        first = self.plot_count
+        self.plot_count += len(scan)
+        scan_cartesian, scan_doppler = to_cartesian(scan)
+        if metrics.enabled:
+            metrics.lap("convert")
+        # Heads are predicted to each plot's own time while gating
+        times = None if self.alpha_beta is None else plot_times(scan, self.scan_count)
+        assignments, gates = associate(
+            store, scan_cartesian, scan_doppler, self.gating, self.doppler_threshold, self.range_threshold,
+            method=self.assignment, metrics=metrics, meas_time=times,
+        )
+        extended = assignments >= 0
+        slots = assignments[extended]
+
+        # Firm tracks keep their counts; tentative ones count the hit and may become firm
+        tentative = slots[store.status[slots] == TENTATIVE]
+        store.hits[tentative] += 1
+        store.misses[tentative] = 0
+        promoted = tentative[:0]
+        if self.confirmation is not None:
+            store.misses[slots] = 0
+            self.confirmation.advance(store, slots)
+            promoted = self.confirmation.confirmed(store, tentative)
+            store.status[promoted] = FIRM
+        elif self.firm_threshold is not None:
+            promoted = tentative[store.hits[tentative] >= self.firm_threshold]
+            store.status[promoted] = FIRM
+
+        # One ASSIGNED or INITIATED event per plot, each FIRMED event just before its plot's
+        index = first + np.arange(len(scan))
+        new_ids = store.next_id + np.cumsum(~extended) - 1
+        plot_events = make_records(
+            np.where(extended, ASSIGNED, INITIATED),
+            np.where(extended, store.track_id[np.maximum(assignments, 0)], new_ids),
+            index,
+            gates,
+        )
+        firmed_rows = np.flatnonzero(np.isin(assignments, promoted))
+        firm_events = make_records(
+            np.full(len(firmed_rows), FIRMED), store.track_id[assignments[firmed_rows]], index[firmed_rows]
+        )
+        events = np.concatenate((firm_events, plot_events))
+        events = events[np.lexsort((events["code"] != FIRMED, events["measurement"]))]
+
+        # Heads move once per scan, so a track takes at most one plot per scan
+        if self.alpha_beta is None:
+            store.extend(slots, scan_cartesian[extended], scan_doppler[extended], scan[extended])
+            new_slots = store.create(scan_cartesian[~extended], scan_doppler[~extended], scan[~extended])
+        else:
+            head_xyz, velocity, covariance = alpha_beta_update(
+                store, slots, scan_cartesian[extended], times[extended], *self.alpha_beta, max_speed=self.max_speed
+            )
+            store.extend(
+                slots, head_xyz, scan_doppler[extended], scan[extended], velocity=velocity, time=times[extended]
+            )
+            store.set_covariance(slots, covariance)
+            new_slots = store.create(
+                scan_cartesian[~extended], scan_doppler[~extended], scan[~extended],
+                velocity=clip_speed(radial_velocity(scan_cartesian[~extended], scan_doppler[~extended]), self.max_speed),
+                time=times[~extended],
+            )
+
+        # Tracks not touched by the scan take their misses in one vectorized step; removed
+        # tracks leave the store and indexes, so later scans never look at them again
+        dead = slots[:0]
+        if self.confirmation is not None:
+            missed = store.live_slots()
+            missed = missed[~np.isin(missed, np.concatenate((slots, new_slots)))]
+            store.misses[missed] += 1
+            if metrics.enabled:
+                metrics.count("misses", len(missed))
+            dead = self.confirmation.deleted(store, missed)
+        elif self.max_misses is not None:
+            # Only tentative tracks count misses here
+            if self.miss_rule == "scan":
+                increment, touched = 1, np.concatenate((slots, new_slots))
+            else:
+                increment, touched = len(new_slots), slots
+            if increment:
+                missed = store.live_slots()
+                missed = missed[(store.status[missed] == TENTATIVE) & ~np.isin(missed, touched)]
+                store.misses[missed] += increment
+                if metrics.enabled:
+                    metrics.count("misses", len(missed) * increment)
+                dead = missed[store.misses[missed] > self.max_misses]
+        if len(dead):
+            dead = dead[np.argsort(store.track_id[dead])]
+            events = np.concatenate((events, make_records(np.full(len(dead), DELETED), store.track_id[dead], -1)))
+            store.remove(dead)
+
+        if metrics.enabled:
+            metrics.lap("maintain")
+        if self.sink.enabled:
+            self.sink.emit(events)
+        if metrics.enabled:
+            metrics.lap("emit")
+            codes = np.bincount(events["code"], minlength=DELETED + 1)
+            for name, code in (
+                ("assigned", ASSIGNED), ("initiated", INITIATED), ("firmed", FIRMED), ("deleted", DELETED)
+            ):
+                metrics.count(name, codes[code])
+            metrics.count("plots", len(scan))
+            metrics.end_scan(len(store.slots), np.count_nonzero(store.status[:len(store)] == FIRM))
+        return events